@@ -1,6 +1,7 @@
 import fs from "node:fs";
 import path from "node:path";
 import { findMatchingClassKey } from "./class-codes";
+import { checkDataCache, type DataCache } from "./manifest";
 
 export interface ExamEvent {
   date: string;
@@ -9,6 +10,21 @@ export interface ExamEvent {
   subject: string;
 }
 
+export interface ExamSlotLoad {
+  date: string;
+  day: string;
+  time: string;
+  /** Classes sitting an exam in this slot */
+  sittings: number;
+}
+
+export interface ExamDayLoad {
+  date: string;
+  day: string;
+  sittings: number;
+  slots: number;
+}
+
 export interface ExamCalendarData {
   metadata: {
     academicYear: string;
@@ -16,6 +32,12 @@ export interface ExamCalendarData {
     pagesParsed: number;
     classCount: number;
     eventCount: number;
+    load?: {
+      slotCount: number;
+      peakSlot: ExamSlotLoad | null;
+      busiestDays: ExamDayLoad[];
+      slots: ExamSlotLoad[];
+    };
   };
   classes: Record<string, ExamEvent[]>;
 }
@@ -25,28 +47,26 @@ export interface ExamClassResult {
   exams: ExamEvent[];
 }
 
-let examCalendarCache:
-  | { data: ExamCalendarData; loadedAt: number }
-  | null = null;
+let examCalendarCache: DataCache<ExamCalendarData> | null = null;
 const EXAM_CACHE_TTL_MS = 6 * 60 * 60 * 1000;
+export const EXAM_CALENDAR_FILE = "exam_calendar2025-2026.json";
 
 export async function loadExamCalendar(): Promise<ExamCalendarData> {
   const now = Date.now();
-  if (
-    examCalendarCache &&
-    now - examCalendarCache.loadedAt < EXAM_CACHE_TTL_MS
-  ) {
+  const { current, hash } = await checkDataCache(
+    examCalendarCache,
+    EXAM_CALENDAR_FILE,
+    EXAM_CACHE_TTL_MS,
+    now,
+  );
+  if (examCalendarCache && current) {
     return examCalendarCache.data;
   }
 
-  const dataPath = path.join(
-    process.cwd(),
-    "data",
-    "exam_calendar2025-2026.json",
-  );
+  const dataPath = path.join(process.cwd(), "data", EXAM_CALENDAR_FILE);
   const raw = await fs.promises.readFile(dataPath, "utf-8");
   const data = JSON.parse(raw) as ExamCalendarData;
-  examCalendarCache = { data, loadedAt: now };
+  examCalendarCache = { data, hash, loadedAt: now };
   return data;
 }
 
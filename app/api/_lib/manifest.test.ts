@@ -0,0 +1,75 @@
+/**
+ * Test ETags derived from the export manifest (data/manifest.json).
+ *
+ * Run with: npx tsx app/api/_lib/manifest.test.ts
+ */
+
+import { dataEtag, loadManifest, notModified } from "./manifest";
+
+let passed = 0;
+let failed = 0;
+
+function assert(condition: boolean, msg: string) {
+  if (condition) {
+    console.log(`  OK: ${msg}`);
+    passed++;
+  } else {
+    console.error(`  FAIL: ${msg}`);
+    failed++;
+  }
+}
+
+(async () => {
+  console.log("\nManifest ETag tests");
+
+  const manifest = await loadManifest();
+  assert(manifest !== null, "data/manifest.json is present");
+  assert(
+    Object.keys(manifest?.files["schedules.json"]?.entries?.classes ?? {})
+      .length > 0,
+    "schedules.json has per-class hashes",
+  );
+
+  const etag = await dataEtag(["schedules.json"], "Lundi", "09:00", null);
+  assert(etag !== null && /^"[0-9a-f]{32}"$/.test(etag), "strong ETag format");
+  assert(
+    etag === (await dataEtag(["schedules.json"], "Lundi", "09:00", null)),
+    "same data and query give the same ETag",
+  );
+  assert(
+    etag !== (await dataEtag(["schedules.json"], "Lundi", "10:30", null)),
+    "a different query gives a different ETag",
+  );
+  assert(
+    (await dataEtag(["missing.json"])) === null,
+    "unknown file gives no ETag",
+  );
+
+  const classKey = Object.keys(
+    manifest?.files["schedules.json"]?.entries?.classes ?? {},
+  )[0];
+  const entryEtag = await dataEtag([
+    { file: "schedules.json", section: "classes", key: classKey },
+  ]);
+  assert(entryEtag !== null, `entry ETag for class ${classKey}`);
+
+  const headers = { "Cache-Control": "public, s-maxage=3600" };
+  const request = (ifNoneMatch?: string) =>
+    new Request("http://localhost/api/v1/rooms/free", {
+      headers: ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {},
+    });
+  assert(notModified(request(), etag, headers) === null, "no validator, full response");
+  assert(
+    notModified(request(`"stale", W/${etag}`), etag, headers)?.status === 304,
+    "matching If-None-Match gives 304",
+  );
+  assert(
+    notModified(request(`"stale"`), etag, headers) === null,
+    "stale If-None-Match gives full response",
+  );
+
+  console.log(`\nResults: ${passed} passed, ${failed} failed`);
+  if (failed > 0) {
+    process.exit(1);
+  }
+})();
@@ -0,0 +1,132 @@
+import crypto from "node:crypto";
+import fs from "node:fs";
+import path from "node:path";
+import { NextResponse } from "next/server";
+
+/** Content hashes written by data/manifest.py next to the exported files */
+export interface ExportManifest {
+  files: Record<
+    string,
+    {
+      hash: string;
+      size: number;
+      /** Per-entry hashes by section, e.g. entries.classes["4SAE11"] */
+      entries?: Record<string, Record<string, string>>;
+    }
+  >;
+}
+
+/** A whole exported file, or one class/room entry of it */
+export type ManifestSource =
+  | string
+  | { file: string; section: string; key: string };
+
+let manifestCache: { data: ExportManifest | null; loadedAt: number } | null =
+  null;
+const MANIFEST_CACHE_TTL_MS = 6 * 60 * 60 * 1000;
+
+/**
+ * Load data/manifest.json, cached like the data it describes.
+ * Data caches reload a file whenever its hash here changes (see
+ * checkDataCache), so ETags derived from this manifest match the data
+ * served.
+ * Returns null when no exporter has written it yet.
+ */
+export async function loadManifest(): Promise<ExportManifest | null> {
+  const now = Date.now();
+  if (manifestCache && now - manifestCache.loadedAt < MANIFEST_CACHE_TTL_MS) {
+    return manifestCache.data;
+  }
+
+  const dataPath = path.join(process.cwd(), "data", "manifest.json");
+  let data: ExportManifest | null = null;
+  try {
+    data = JSON.parse(await fs.promises.readFile(dataPath, "utf-8"));
+  } catch {
+    data = null;
+  }
+  manifestCache = { data, loadedAt: now };
+  return data;
+}
+
+/** A data file parsed in memory, with the manifest hash it was loaded at */
+export interface DataCache<T> {
+  data: T;
+  /** Manifest hash of the file when it was loaded (null: not recorded) */
+  hash: string | null;
+  loadedAt: number;
+}
+
+/**
+ * Current manifest hash of `file`, and whether `cache` still holds it.
+ * Data caches follow the manifest, so the ETags derived from it always
+ * describe the data being served; a file the manifest does not record
+ * expires after `ttlMs` instead.
+ */
+export async function checkDataCache<T>(
+  cache: DataCache<T> | null,
+  file: string,
+  ttlMs: number,
+  now: number,
+): Promise<{ current: boolean; hash: string | null }> {
+  const manifest = await loadManifest();
+  const hash = manifest?.files[file]?.hash ?? null;
+  if (!cache) return { current: false, hash };
+  const current =
+    hash !== null ? cache.hash === hash : now - cache.loadedAt < ttlMs;
+  return { current, hash };
+}
+
+/**
+ * Strong ETag of a response computed from `sources` and the request
+ * `parts` it depends on (query parameters, resolved day/time...).
+ * Returns null when the manifest or one of the sources is missing.
+ */
+export async function dataEtag(
+  sources: ManifestSource[],
+  ...parts: (string | null | undefined)[]
+): Promise<string | null> {
+  const manifest = await loadManifest();
+  if (!manifest) return null;
+
+  const hash = crypto.createHash("sha256");
+  for (const source of sources) {
+    const value =
+      typeof source === "string"
+        ? manifest.files[source]?.hash
+        : manifest.files[source.file]?.entries?.[source.section]?.[source.key];
+    if (!value) return null;
+    hash.update(value).update("\0");
+  }
+  for (const part of parts) hash.update(part ?? "").update("\0");
+  return `"${hash.digest("hex").slice(0, 32)}"`;
+}
+
+/** Response headers with the ETag added when there is one. */
+export function withEtag(
+  headers: Record<string, string>,
+  etag: string | null,
+): Record<string, string> {
+  return etag ? { ...headers, ETag: etag } : headers;
+}
+
+/**
+ * 304 response when the request's If-None-Match already holds `etag`,
+ * otherwise null and the caller sends the full response.
+ */
+export function notModified(
+  req: Request,
+  etag: string | null,
+  headers: Record<string, string>,
+): NextResponse | null {
+  const ifNoneMatch = req.headers.get("if-none-match");
+  if (!etag || !ifNoneMatch) return null;
+
+  const matches = ifNoneMatch
+    .split(",")
+    .map((tag) => tag.trim().replace(/^W\//, ""))
+    .some((tag) => tag === etag || tag === "*");
+  return matches
+    ? new NextResponse(null, { status: 304, headers: withEtag(headers, etag) })
+    : null;
+}
@@ -9,6 +9,10 @@
 import {
   findNearestRoom,
   findNearestEmptyRoomForClass,
+  findFreeRooms,
+  loadClassSchedule,
+  loadRoomRegistry,
+  loadScheduleIndex,
   loadSchedules,
   parseRoom,
   snapToSessionTime,
@@ -356,6 +360,67 @@ async function integrationTests() {
     }
     assert(true, "Day-dependent variation logged (see above)");
   }
+
+  // ─── Test 11: Precomputed ranking gives the same answer as full scoring ─
+
+  console.log("\nTest 11: Room registry ranking matches full proximity scoring");
+  {
+    const registry = await loadRoomRegistry();
+    if (!registry) {
+      console.log("  ⚠️  data/rooms.json not found, skipping registry test");
+      return;
+    }
+
+    let mismatches = 0;
+    let checked = 0;
+    for (const day of allDays) {
+      for (const time of timeSlots) {
+        const free = await findFreeRooms({ day, time });
+        for (const origin of Object.keys(registry.rooms)) {
+          // Origin excluded, and origin kept (it wins when it is free)
+          for (const exclude of [[origin], []]) {
+            const scored = findNearestRoom(origin, free.empty, free.warning, exclude);
+            const ranked = findNearestRoom(
+              origin,
+              free.empty,
+              free.warning,
+              exclude,
+              registry,
+            );
+            checked++;
+            if (JSON.stringify(scored) !== JSON.stringify(ranked)) mismatches++;
+          }
+        }
+      }
+    }
+    assert(mismatches === 0, `${checked} lookups identical with registry (${mismatches} mismatches)`);
+  }
+
+  // ─── Test 12: Class shards hold the same schedule as schedules.json ─────
+
+  console.log("\nTest 12: Class shard lookups match schedules.json");
+  {
+    const index = await loadScheduleIndex();
+    if (!index) {
+      console.log("  ⚠️  data/schedules/_index.json not found, skipping shard test");
+      return;
+    }
+
+    const missing = Object.keys(schedules).filter((key) => !index.classes[key]);
+    assert(missing.length === 0, `Every class has a shard (missing: ${missing.join(", ")})`);
+
+    let mismatches = 0;
+    for (const key of Object.keys(schedules)) {
+      const found = await loadClassSchedule(key);
+      if (
+        found?.className !== key ||
+        JSON.stringify(found.schedule) !== JSON.stringify(schedules[key])
+      ) {
+        mismatches++;
+      }
+    }
+    assert(mismatches === 0, `${Object.keys(schedules).length} shards identical (${mismatches} mismatches)`);
+  }
 }
 
 (async () => {
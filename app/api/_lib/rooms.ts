@@ -1,6 +1,8 @@
 import fs from "node:fs";
 import path from "node:path";
 import { TIME_SLOTS, FRIDAY_AFTERNOON } from "@/app/config";
+import { findMatchingClassKey } from "@/app/api/_lib/class-codes";
+import { checkDataCache, type DataCache } from "@/app/api/_lib/manifest";
 
 // ─── Types ───────────────────────────────────────────────────────────────────
 
@@ -25,6 +27,22 @@ export interface ParsedRoom {
   roomNum: number;
 }
 
+/** Precomputed room data written by data/rooms.py next to schedules.json */
+export interface RoomRegistry {
+  ranking_size: number;
+  rooms: Record<
+    string,
+    {
+      bloc: string;
+      group: string;
+      floor: number;
+      number: number;
+      /** Other rooms as [code, score], closest first (ties of the last kept) */
+      nearest: [string, number][];
+    }
+  >;
+}
+
 export interface NearestRoomResult {
   nearest: string | null;
   isWarning: boolean;
@@ -76,26 +94,128 @@ interface ScheduleEvent {
 // eslint-disable-next-line @typescript-eslint/no-explicit-any
 type Schedules = Record<string, any>;
 
-let schedulesCache: { data: Schedules; loadedAt: number } | null = null;
+let schedulesCache: DataCache<Schedules> | null = null;
 const SCHEDULES_CACHE_TTL_MS = 6 * 60 * 60 * 1000; // Schedules update weekly; refresh periodically for resilience.
 
 /** Load & parse the schedules JSON from disk, cached across warm invocations. */
 export async function loadSchedules(): Promise<Schedules> {
   const now = Date.now();
-  if (
-    schedulesCache &&
-    now - schedulesCache.loadedAt < SCHEDULES_CACHE_TTL_MS
-  ) {
+  const { current, hash } = await checkDataCache(
+    schedulesCache,
+    "schedules.json",
+    SCHEDULES_CACHE_TTL_MS,
+    now,
+  );
+  if (schedulesCache && current) {
     return schedulesCache.data;
   }
 
   const dataPath = path.join(process.cwd(), "data", "schedules.json");
   const raw = await fs.promises.readFile(dataPath, "utf-8");
   const data = JSON.parse(raw) as Schedules;
-  schedulesCache = { data, loadedAt: now };
+  schedulesCache = { data, hash, loadedAt: now };
+  return data;
+}
+
+let roomRegistryCache: DataCache<RoomRegistry | null> | null = null;
+
+/**
+ * Load the precomputed room registry, cached like the schedules.
+ * Returns null when data/rooms.json has not been generated yet.
+ */
+export async function loadRoomRegistry(): Promise<RoomRegistry | null> {
+  const now = Date.now();
+  const { current, hash } = await checkDataCache(
+    roomRegistryCache,
+    "rooms.json",
+    SCHEDULES_CACHE_TTL_MS,
+    now,
+  );
+  if (roomRegistryCache && current) {
+    return roomRegistryCache.data;
+  }
+
+  const dataPath = path.join(process.cwd(), "data", "rooms.json");
+  let data: RoomRegistry | null = null;
+  try {
+    data = JSON.parse(await fs.promises.readFile(dataPath, "utf-8"));
+  } catch {
+    data = null;
+  }
+  roomRegistryCache = { data, hash, loadedAt: now };
+  return data;
+}
+
+/** Index of the per-class and per-room shards written by data/shards.py */
+export interface ScheduleShardIndex {
+  classes: Record<string, { file: string; hash: string }>;
+  rooms: Record<string, { file: string; hash: string }>;
+}
+
+const SHARD_DIR = path.join("data", "schedules");
+
+let shardIndexCache: DataCache<ScheduleShardIndex | null> | null = null;
+// Shard contents by class name; an entry is reused while its hash matches
+const classShardCache = new Map<string, { hash: string; data: unknown }>();
+
+/**
+ * Load data/schedules/_index.json, cached like the schedules.
+ * The shards are written by the same export as schedules.json, so the
+ * index is reloaded when that file's manifest hash changes.
+ * Returns null when the shards have not been generated yet.
+ */
+export async function loadScheduleIndex(): Promise<ScheduleShardIndex | null> {
+  const now = Date.now();
+  const { current, hash } = await checkDataCache(
+    shardIndexCache,
+    "schedules.json",
+    SCHEDULES_CACHE_TTL_MS,
+    now,
+  );
+  if (shardIndexCache && current) {
+    return shardIndexCache.data;
+  }
+
+  const dataPath = path.join(process.cwd(), SHARD_DIR, "_index.json");
+  let data: ScheduleShardIndex | null = null;
+  try {
+    data = JSON.parse(await fs.promises.readFile(dataPath, "utf-8"));
+  } catch {
+    data = null;
+  }
+  shardIndexCache = { data, hash, loadedAt: now };
   return data;
 }
 
+/**
+ * Look up one class's schedule by a user-typed class code.
+ * Reads only that class's shard; falls back to the full schedules.json
+ * when no shard index exists.
+ */
+export async function loadClassSchedule(
+  classCode: string,
+): Promise<{ className: string; schedule: Schedules[string] } | null> {
+  const index = await loadScheduleIndex();
+  if (!index) {
+    const schedules = await loadSchedules();
+    const className = findMatchingClassKey(classCode, Object.keys(schedules));
+    return className ? { className, schedule: schedules[className] } : null;
+  }
+
+  const className = findMatchingClassKey(classCode, Object.keys(index.classes));
+  if (!className) return null;
+
+  const entry = index.classes[className];
+  const cached = classShardCache.get(className);
+  if (cached && cached.hash === entry.hash) {
+    return { className, schedule: cached.data };
+  }
+  const dataPath = path.join(process.cwd(), SHARD_DIR, entry.file);
+  const data = JSON.parse(await fs.promises.readFile(dataPath, "utf-8"));
+  classShardCache.set(className, { hash: entry.hash, data });
+  return { className, schedule: data };
+}
+
 // ─── Internal helpers (broken out to reduce cognitive complexity) ─────────
 
 const WEEKDAY_ORDER = [
@@ -327,15 +447,84 @@ function proximityScore(origin: ParsedRoom, candidate: ParsedRoom): number {
   ); // further floors
 }
 
+const NEAREST_CANDIDATES = 10;
+
+/**
+ * Walk the precomputed ranking of `originRoom` instead of scoring every room.
+ *
+ * The ranking holds the other rooms; the origin is walked first at score
+ * 0, as full scoring gives it when it is free and not excluded. Every room
+ * left out of a ranking scores strictly worse than the rooms in it, so
+ * once the walk has collected NEAREST_CANDIDATES rooms the result is the
+ * same as full scoring. Returns null when the walk cannot guarantee
+ * that (unknown origin or too few free rooms in the ranking).
+ */
+function findNearestRoomRanked(
+  originRoom: string,
+  emptyRooms: string[],
+  warningRooms: string[],
+  excludeSet: Set<string>,
+  registry: RoomRegistry,
+): NearestRoomResult | null {
+  const entry = registry.rooms[originRoom.trim()];
+  if (!entry) return null;
+
+  // Original list positions keep tie order identical to the stable sort below
+  const emptyIndex = new Map(emptyRooms.map((r, i) => [r, i]));
+  const warningIndex = new Map(
+    warningRooms.map((r, i) => [r, emptyRooms.length + i]),
+  );
+
+  const candidates: {
+    room: string;
+    isWarning: boolean;
+    score: number;
+    order: number;
+  }[] = [];
+  // The ranking lists other rooms only; the origin itself scores 0
+  const originCode = originRoom.trim();
+  const walk: [string, number][] = [[originCode, 0], ...entry.nearest];
+  for (const [room, score] of walk) {
+    if (excludeSet.has(room.toUpperCase())) continue;
+    const emptyAt = emptyIndex.get(room);
+    if (emptyAt !== undefined) {
+      candidates.push({ room, isWarning: false, score, order: emptyAt });
+      continue;
+    }
+    const warningAt = warningIndex.get(room);
+    if (warningAt !== undefined) {
+      candidates.push({
+        room,
+        isWarning: true,
+        score: score + 0.5,
+        order: warningAt,
+      });
+    }
+  }
+  if (candidates.length < NEAREST_CANDIDATES) return null;
+
+  candidates.sort((a, b) => a.score - b.score || a.order - b.order);
+  const best = candidates[0];
+  return {
+    nearest: best.room,
+    isWarning: best.isWarning,
+    allCandidates: candidates
+      .slice(0, NEAREST_CANDIDATES)
+      .map(({ room, isWarning, score }) => ({ room, isWarning, score })),
+  };
+}
+
 /**
  * Find the nearest empty room to `originRoom` given the current empty + warning lists.
- * Uses the proximity scoring system above.
+ * Uses the proximity scoring system above, or the precomputed nearest-room
+ * ranking from `registry` when one is given and covers the request.
  */
 export function findNearestRoom(
   originRoom: string,
   emptyRooms: string[],
   warningRooms: string[],
   excludeRooms: string[] = [],
+  registry: RoomRegistry | null = null,
 ): NearestRoomResult {
   const origin = parseRoom(originRoom);
   if (!origin) {
@@ -344,6 +533,17 @@ export function findNearestRoom(
 
   const excludeSet = new Set(excludeRooms.map((r) => r.trim().toUpperCase()));
 
+  if (registry) {
+    const ranked = findNearestRoomRanked(
+      originRoom,
+      emptyRooms,
+      warningRooms,
+      excludeSet,
+      registry,
+    );
+    if (ranked) return ranked;
+  }
+
   const candidates: { room: string; isWarning: boolean; score: number }[] = [];
 
   for (const r of emptyRooms) {
@@ -374,7 +574,7 @@ export function findNearestRoom(
   return {
     nearest: best?.room ?? null,
     isWarning: best?.isWarning ?? false,
-    allCandidates: candidates.slice(0, 10),
+    allCandidates: candidates.slice(0, NEAREST_CANDIDATES),
   };
 }
 
@@ -387,24 +587,41 @@ export async function findNearestEmptyRoomNow(
   day?: string | null,
   time?: string | null,
 ): Promise<NearestRoomResult & { day: string | null; time: string | null }> {
-  // Auto-detect current day/time when not provided so that occupancy
-  // is always computed (otherwise all rooms appear empty).
-  if (!day || !time) {
-    const now = getCurrentDayAndTime();
-    if (!day) day = now.day;
-    if (!time) time = now.time;
-    // Snap to nearest school session so outside-hours queries reflect
-    // rooms that will actually be free when classes begin.
-    ({ day, time } = snapToSessionTime(day, time));
-  }
+  ({ day, time } = resolveDayTime(day, time));
 
-  const result = await findFreeRooms({ day, time });
-  const nearest = findNearestRoom(room, result.empty, result.warning);
+  const [result, registry] = await Promise.all([
+    findFreeRooms({ day, time }),
+    loadRoomRegistry(),
+  ]);
+  const nearest = findNearestRoom(
+    room,
+    result.empty,
+    result.warning,
+    [],
+    registry,
+  );
   return { ...nearest, day: day ?? null, time: time ?? null };
 }
 
 // ─── Current time helpers ────────────────────────────────────────────────
 
+/**
+ * Day and time a nearest-room query is answered for. Missing values
+ * default to now, so that occupancy is always computed (otherwise all
+ * rooms appear empty), snapped to the nearest school session so
+ * outside-hours queries reflect rooms that will actually be free when
+ * classes begin. Cheap: reads no data, so routes can derive their ETag
+ * from it before doing any work.
+ */
+export function resolveDayTime(
+  day?: string | null,
+  time?: string | null,
+): { day: string; time: string } {
+  if (day && time) return { day, time };
+  const now = getCurrentDayAndTime();
+  return snapToSessionTime(day || now.day, time || now.time);
+}
+
 const DAY_NAMES = [
   "Dimanche",
   "Lundi",
@@ -578,16 +795,7 @@ export async function findNearestEmptyRoomForClass(
     currentRoom: string | null;
   }
 > {
-  // Auto-detect current day/time when not provided so that occupancy
-  // is always computed (otherwise all rooms appear empty).
-  if (!day || !time) {
-    const now = getCurrentDayAndTime();
-    if (!day) day = now.day;
-    if (!time) time = now.time;
-    // Snap to nearest school session so outside-hours queries reflect
-    // rooms that will actually be free when classes begin.
-    ({ day, time } = snapToSessionTime(day, time));
-  }
+  ({ day, time } = resolveDayTime(day, time));
 
   const resolved = await resolveClassToRoom(classCode, day, time);
 
@@ -603,7 +811,10 @@ export async function findNearestEmptyRoomForClass(
     };
   }
 
-  const result = await findFreeRooms({ day, time });
+  const [result, registry] = await Promise.all([
+    findFreeRooms({ day, time }),
+    loadRoomRegistry(),
+  ]);
 
   // Exclude the class's current room and primary room from candidates
   // so the nearest suggestion is always a *different* room.
@@ -618,6 +829,7 @@ export async function findNearestEmptyRoomForClass(
     result.empty,
     result.warning,
     excludeRooms,
+    registry,
   );
 
   return {
@@ -1,7 +1,6 @@
 import { NextRequest, NextResponse } from "next/server";
 import { TIME_SLOTS } from "@/app/config";
-import { loadSchedules } from "@/app/api/_lib/rooms";
-import { findMatchingClassKey } from "@/app/api/_lib/class-codes";
+import { loadClassSchedule } from "@/app/api/_lib/rooms";
 
 const CACHE_HEADERS = {
   "Cache-Control": "public, s-maxage=1800, stale-while-revalidate=3600",
@@ -25,10 +24,6 @@ interface ClassSchedule {
   };
 }
 
-interface ScheduleData {
-  [className: string]: ClassSchedule;
-}
-
 function parseTimeStr(s: string): number | null {
   if (!s) return null;
   const normalized = s.replaceAll("H", ":").trim();
@@ -63,14 +58,10 @@ export async function GET(
     const queryTime = searchParams.get("time") || "";
     const queryDay = searchParams.get("day") || "";
 
-    const schedules = (await loadSchedules()) as ScheduleData;
-
-    // Find the class in the schedules using flexible matching
-    const matchedClassName = findMatchingClassKey(
-      classCode,
-      Object.keys(schedules),
-    );
-    const classSchedule = matchedClassName ? schedules[matchedClassName] : null;
+    // Find the class using flexible matching; only its shard is read
+    const match = await loadClassSchedule(classCode);
+    const matchedClassName = match?.className ?? null;
+    const classSchedule = (match?.schedule as ClassSchedule) ?? null;
 
     if (!classSchedule || !matchedClassName) {
       return NextResponse.json(
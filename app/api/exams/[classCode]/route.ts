@@ -1,5 +1,10 @@
 import { NextResponse } from "next/server";
-import { findExamClass, loadExamCalendar } from "@/app/api/_lib/exams";
+import {
+  EXAM_CALENDAR_FILE,
+  findExamClass,
+  loadExamCalendar,
+} from "@/app/api/_lib/exams";
+import { dataEtag, notModified, withEtag } from "@/app/api/_lib/manifest";
 
 const CACHE_HEADERS = {
   "Cache-Control": "public, s-maxage=1800, stale-while-revalidate=3600",
@@ -7,7 +12,7 @@ const CACHE_HEADERS = {
 };
 
 export async function GET(
-  _request: Request,
+  request: Request,
   context: { params: Promise<{ classCode: string }> },
 ) {
   try {
@@ -15,6 +20,23 @@ export async function GET(
     const examCalendar = await loadExamCalendar();
     const result = findExamClass(classCode, examCalendar);
 
+    // A found class is validated by its own entry, so other classes'
+    // changes do not invalidate it
+    const etag = result
+      ? await dataEtag(
+          [
+            {
+              file: EXAM_CALENDAR_FILE,
+              section: "classes",
+              key: result.classCode,
+            },
+          ],
+          result.classCode,
+        )
+      : await dataEtag([EXAM_CALENDAR_FILE], classCode);
+    const unchanged = notModified(request, etag, CACHE_HEADERS);
+    if (unchanged) return unchanged;
+
     if (!result) {
       return NextResponse.json(
         {
@@ -22,7 +44,7 @@ export async function GET(
           status: "no_exams",
           exams: [],
         },
-        { headers: CACHE_HEADERS },
+        { headers: withEtag(CACHE_HEADERS, etag) },
       );
     }
 
@@ -32,7 +54,7 @@ export async function GET(
         status: "found",
         exams: result.exams,
       },
-      { headers: CACHE_HEADERS },
+      { headers: withEtag(CACHE_HEADERS, etag) },
     );
   } catch {
     return NextResponse.json(
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from "next/server";
 import { validateApiKey } from "@/app/api/v1/_lib/auth";
 import { findFreeRooms } from "@/app/api/_lib/rooms";
+import { dataEtag, notModified, withEtag } from "@/app/api/_lib/manifest";
 
 const CACHE_HEADERS = {
   "Cache-Control": "public, s-maxage=3600, stale-while-revalidate=86400",
@@ -26,8 +27,13 @@ export async function GET(req: NextRequest) {
       );
     }
 
+    // The answer only depends on the schedules and the query
+    const etag = await dataEtag(["schedules.json"], day, time, building);
+    const unchanged = notModified(req, etag, CACHE_HEADERS);
+    if (unchanged) return unchanged;
+
     const result = await findFreeRooms({ day, time, building });
-    return NextResponse.json(result, { headers: CACHE_HEADERS });
+    return NextResponse.json(result, { headers: withEtag(CACHE_HEADERS, etag) });
   } catch (err: unknown) {
     return NextResponse.json(
       { error: err instanceof Error ? err.message : String(err) },
@@ -1,6 +1,10 @@
 import { NextRequest, NextResponse } from "next/server";
 import { validateApiKey } from "@/app/api/v1/_lib/auth";
-import { findNearestEmptyRoomForClass } from "@/app/api/_lib/rooms";
+import {
+  findNearestEmptyRoomForClass,
+  resolveDayTime,
+} from "@/app/api/_lib/rooms";
+import { dataEtag, notModified, withEtag } from "@/app/api/_lib/manifest";
 
 const CACHE_HEADERS = {
   "Cache-Control": "public, s-maxage=1800, stale-while-revalidate=3600",
@@ -32,7 +36,23 @@ export async function GET(req: NextRequest) {
       );
     }
 
-    const result = await findNearestEmptyRoomForClass(classParam, day, time);
+    // The answer only depends on the data and the query, with day/time
+    // resolved first since they default to "now"; a 304 skips the lookup
+    const resolved = resolveDayTime(day, time);
+    const etag = await dataEtag(
+      ["schedules.json", "rooms.json"],
+      classParam,
+      resolved.day,
+      resolved.time,
+    );
+    const unchanged = notModified(req, etag, CACHE_HEADERS);
+    if (unchanged) return unchanged;
+
+    const result = await findNearestEmptyRoomForClass(
+      classParam,
+      resolved.day,
+      resolved.time,
+    );
 
     if (!result.currentRoom) {
       return NextResponse.json(
@@ -51,7 +71,7 @@ export async function GET(req: NextRequest) {
         time: result.time,
         topCandidates: result.allCandidates,
       },
-      { headers: CACHE_HEADERS },
+      { headers: withEtag(CACHE_HEADERS, etag) },
     );
   } catch (err: unknown) {
     return NextResponse.json(
@@ -0,0 +1,230 @@
+"""Benchmarks for the data exporters.
+
+Run from the repository root, e.g. ``python data/benchmarks.py startup``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+DATA_DIR = Path(__file__).resolve().parent
+
+# Modules whose import cost the exporters defer to the parsing code paths
+HEAVY_MODULES = ("pdfplumber", "PyPDF2", "pdfminer")
+
+
+def time_command(command: list[str], runs: int) -> float:
+    """Median wall-clock seconds of running `command` in a fresh process."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=DATA_DIR, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def import_profile(command: list[str]) -> list[tuple[int, str]]:
+    """(cumulative µs, module) for top-level imports reported by -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        cwd=DATA_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[12:].split("|")
+        # Nested imports are indented further; keep the top-level ones
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return imports
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    commands = {
+        "data_exporter.py --help": ["data_exporter.py", "--help"],
+        "exam_calendar_exporter.py --help": ["exam_calendar_exporter.py", "--help"],
+        "import data_exporter": ["-c", "import data_exporter"],
+        "eager PDF imports (previous floor)": ["-c", "import pdfplumber, PyPDF2"],
+        "interpreter only": ["-c", "pass"],
+    }
+
+    print(f"Startup time, median of {args.runs} runs:")
+    for label, command in commands.items():
+        seconds = time_command([sys.executable, *command], args.runs)
+        print(f"  {label:<36} {seconds * 1000:8.1f} ms")
+
+    for label in ("data_exporter.py --help", "exam_calendar_exporter.py --help"):
+        imports = import_profile(commands[label])
+        heavy = sorted(
+            name for _, name in imports if name.split(".")[0] in HEAVY_MODULES
+        )
+        print(f"\n-X importtime for {label}:")
+        print(f"  total imports: {sum(us for us, _ in imports) / 1000:.1f} ms")
+        for cumulative, name in sorted(imports, reverse=True)[:5]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        print(f"  PDF libraries imported: {', '.join(heavy) or 'none'}")
+
+
+def bench_words(args: argparse.Namespace) -> int:
+    """Compare tokenize_chars with pdfplumber's extract_words, page by page."""
+    import pdfplumber
+    from pdf_backends import tokenize_chars
+
+    def fields(word) -> tuple:
+        return word.text, word.x0, word.x1, word.top
+
+    reference_seconds = tokenizer_seconds = 0.0
+    mismatches = []
+    with pdfplumber.open(args.pdf) as pdf:
+        pages = pdf.pages[: args.pages] if args.pages else pdf.pages
+        for page_num, page in enumerate(pages, 1):
+            chars = page.chars  # parsed once, outside the timings
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                reference = page.extract_words()
+            middle = time.perf_counter()
+            for _ in range(args.runs):
+                tokens = tokenize_chars(chars)
+            end = time.perf_counter()
+            reference_seconds += middle - start
+            tokenizer_seconds += end - middle
+
+            expected = [(w["text"], w["x0"], w["x1"], w["top"]) for w in reference]
+            if expected != list(map(fields, tokens)):
+                mismatches.append(page_num)
+            page.close()
+
+    count = len(pages) * args.runs
+    print(f"Word building on {Path(args.pdf).name}, {len(pages)} pages "
+          f"x {args.runs} runs:")
+    print(f"  extract_words   {reference_seconds / count * 1000:7.3f} ms/page")
+    print(f"  tokenize_chars  {tokenizer_seconds / count * 1000:7.3f} ms/page "
+          f"({reference_seconds / tokenizer_seconds:.1f}x)")
+    if mismatches:
+        print(f"  MISMATCH on pages {mismatches[:10]}")
+        return 1
+    print("  identical words on every page")
+    return 0
+
+
+def bench_backends(args: argparse.Namespace) -> int:
+    """Time each extraction backend's words() and check it against pdfplumber."""
+    from pdf_backends import BACKENDS, open_backend
+
+    pdfs = args.pdfs or [str(DATA_DIR / "last.pdf"),
+                         str(DATA_DIR / "Calendrier_Session_Principale_2526_VF.pdf")]
+    status = 0
+    for pdf_path in pdfs:
+        print(f"{Path(pdf_path).name}:")
+        reference = None
+        for name in BACKENDS:
+            if name == "fixture":  # reads recorded words, not PDFs
+                continue
+            start = time.perf_counter()
+            try:
+                document = open_backend(name, pdf_path)
+                pages = [
+                    [(w.text, w.x0, w.x1, w.top) for w in document[index].words()]
+                    for index in range(len(document))
+                ]
+                document.close()
+            except ValueError as error:
+                print(f"  {name:<10} unsupported: {error}")
+                continue
+            seconds = time.perf_counter() - start
+            line = (f"  {name:<10} {seconds:6.2f} s "
+                    f"({seconds / len(pages) * 1000:6.1f} ms/page)")
+            if reference is None:
+                reference = pages
+                print(line)
+                continue
+
+            text_mismatches = [
+                number for number, (ours, theirs) in enumerate(zip(pages, reference), 1)
+                if [w[0] for w in ours] != [w[0] for w in theirs]
+            ]
+            drift = max(
+                (abs(a - b)
+                 for ours, theirs in zip(pages, reference)
+                 for word, other in zip(ours, theirs)
+                 for a, b in zip(word[1:], other[1:])),
+                default=0.0,
+            )
+            print(f"{line}  max position drift {drift:.2g} pt")
+            if text_mismatches or len(pages) != len(reference):
+                print(f"  {'':<10} TEXT MISMATCH on pages {text_mismatches[:10]}")
+                status = 1
+    return status
+
+
+def bench_replay(args: argparse.Namespace) -> int:
+    """Time our parsing stages alone, fed from recorded fixtures."""
+    from word_fixtures import FIXTURE_DIR, check_fixture, replay
+
+    fixtures = args.fixtures or sorted(FIXTURE_DIR.glob("*.json.gz"))
+    status = 0
+    print(f"Parsing from fixtures, median of {args.runs} runs:")
+    for path in fixtures:
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            replay(path)
+            samples.append(time.perf_counter() - start)
+        differing = check_fixture(path)
+        print(f"  {Path(path).name:<56} "
+              f"{statistics.median(samples) * 1000:8.1f} ms"
+              f"{'  OUTPUT DIFFERS' if differing else ''}")
+        status |= bool(differing)
+    return status
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    startup = subparsers.add_parser(
+        "startup", help="Process startup and import cost of the exporter CLIs"
+    )
+    startup.add_argument("--runs", type=int, default=7)
+    startup.set_defaults(func=bench_startup)
+
+    words = subparsers.add_parser(
+        "words", help="tokenize_chars against pdfplumber's extract_words"
+    )
+    words.add_argument("pdf", nargs="?", default=str(DATA_DIR / "last.pdf"))
+    words.add_argument("--runs", type=int, default=3)
+    words.add_argument("--pages", type=int, default=0,
+                       help="Only the first N pages (default: all)")
+    words.set_defaults(func=bench_words)
+
+    backends = subparsers.add_parser(
+        "backends", help="Speed and output parity of the extraction backends"
+    )
+    backends.add_argument("pdfs", nargs="*", metavar="PDF",
+                          help="PDFs to read (default: the bundled ones)")
+    backends.set_defaults(func=bench_backends)
+
+    replay = subparsers.add_parser(
+        "replay", help="Parser time alone, replaying recorded fixtures"
+    )
+    replay.add_argument("fixtures", nargs="*", metavar="FIXTURE",
+                        help="Fixture files (default: every one in fixtures/)")
+    replay.add_argument("--runs", type=int, default=5)
+    replay.set_defaults(func=bench_replay)
+
+    args = parser.parse_args()
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,290 @@
 """PDF Schedule Parser - Converts ESPRIT schedule PDFs to JSON format."""
 
+# PDF libraries are imported where they are used: they dominate startup
+# time and are not needed for --help or the other non-parsing paths.
+import argparse
+import copy
+import heapq
+import io
 import re
 import json
 import sys
-import PyPDF2
-import pdfplumber
+from bisect import bisect_left
+from collections import Counter
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+
+from manifest import update_manifest
+from pdf_backends import BACKENDS, FixturePage, TieredPage
+from rooms import REGISTRY_FILE, write_room_registry
+from shards import room_shards, shard_directory, write_schedule_shards
+from warning_rules import load_rules
+
+
+# Literal "(...)" or hex "<...>" string operands in a page content stream
+PDF_STRING_PATTERN = re.compile(rb'\(((?:[^()\\]|\\.)*)\)|<([0-9A-Fa-f\s]*)>')
+# An XObject painted by the page content stream: "/Fm0 Do"
+XOBJECT_DO_PATTERN = re.compile(rb'/[^\s/\[\]()<>{}%]+\s*Do\b')
+
+# How to resolve a class name that appears in more than one merged set
+DUPLICATE_POLICIES = ('error', 'first', 'last', 'suffix')
+
+# Duplicate class names listed in a merge error before summarizing the rest
+DUPLICATE_PREVIEW = 10
+
+# Course values written for synthetic slots by the FREE-slot review
+FREE_MARKERS = ('FREE', 'NOT-FREE', 'FREEWARNING')
+
+# French day names by date.weekday() (Monday first)
+WEEKDAY_NAMES = ('Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi',
+                 'Dimanche')
+
+# Time markers of a timetable page: hour labels of the time axis ('09h')
+# and the start/end times printed in each slot ('09:00')
+HOUR_MARKER_PATTERN = re.compile(r'^\d{2}h$')
+CLOCK_MARKER_PATTERN = re.compile(r'^\d{2}:\d{2}$')
+
+# Exact slot time format written by the exporter, e.g. '09H:00-12H:15'
+SLOT_TIME_PATTERN = re.compile(r'^(\d{2})H:(\d{2})-(\d{2})H:(\d{2})$')
+
+
+# Pages extracted ahead of assembly, and classes queued for the writer
+DEFAULT_QUEUE_DEPTH = 16
+
+# The export the web app serves; only it refreshes the files read alongside
+PUBLISHED_OUTPUT = Path(__file__).resolve().parent / 'schedules.json'
+
+# Size bound of the memoized text helpers; course names and class tokens
+# repeat across pages, so a few thousand entries cover a whole PDF
+TEXT_CACHE_SIZE = 4096
+
+# Class names (allow accented characters like é, à, è, ô):
+# - \d[\w-]+\d* : like 4SAE11, 3IA2, 4ERP-BI1, 4GamiX1, 4MécaT1, 3A1
+# - [\w]+\d+ : like PREPA1, SLEAM2
+# - \d+[\w-]+ : more flexible digit-letter combos
+# \w matches [A-Za-z0-9_] plus Unicode letters (like é, à, etc)
+CLASS_NAME_PATTERNS = (
+    re.compile(r'^\d[\w-]+\d*$', re.UNICODE),
+    re.compile(r'^[\w]+\d+$', re.UNICODE | re.IGNORECASE),
+    re.compile(r'^\d+[\w-]+$', re.UNICODE),
+)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def looks_like_class_name(text):
+    """Check if a word has the shape of a class name like 4SAE11."""
+    return any(pattern.match(text) for pattern in CLASS_NAME_PATTERNS)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def clean_course_name(course_name):
+    """Clean course name by removing unwanted elements.
+
+    Args:
+        course_name: Raw course name
+
+    Returns:
+        str: Cleaned course name
+    """
+    # Remove years (2025, etc.)
+    course_name = re.sub(r'\b\d{4}\b', '', course_name)
+    # Remove time references like "17h", "16h" - with or without word boundary
+    # This handles cases like "17hARCHITECTURE" -> "ARCHITECTURE"
+    course_name = re.sub(r'^\d{2}h', '', course_name)  # At start
+    # In middle with space before
+    course_name = re.sub(r'\s\d{2}h\b', '', course_name)
+    # Clean up whitespace
+    course_name = re.sub(r'\s+', ' ', course_name).strip()
+    return course_name
+
+
+# Memoized helpers reported in the parse summary
+CACHED_TEXT_HELPERS = {
+    'course names': clean_course_name,
+    'class names': looks_like_class_name,
+}
+
+
+class RoomOccupancyIndex:
+    """Per-room, per-day index of occupied time ranges.
+
+    Intervals are sorted by start minute and paired with a running maximum
+    of their end minutes, so an overlap query is one bisect instead of a
+    scan over every scheduled time of the room.
+    """
+
+    def __init__(self, intervals):
+        """Build the index.
+
+        Args:
+            intervals: Iterable of (room, day_key, start, end) tuples,
+                times in minutes since midnight
+        """
+        grouped = {}
+        for room, day_key, start, end in intervals:
+            grouped.setdefault((room, day_key), []).append((start, end))
+
+        self._index = {}
+        for key, spans in grouped.items():
+            spans.sort()
+            starts = [start for start, _ in spans]
+            reach = list(accumulate((end for _, end in spans), max))
+            self._index[key] = (starts, reach)
+
+    def __len__(self):
+        return len(self._index)
+
+    def is_occupied(self, room, day_key, start, end):
+        """Check if any indexed interval overlaps [start, end).
+
+        Args:
+            room: Room identifier
+            day_key: Day key string
+            start: Start of the range (minutes)
+            end: End of the range (minutes)
+
+        Returns:
+            bool: True if the room is occupied during the range
+        """
+        entry = self._index.get((room, day_key))
+        if entry is None:
+            return False
+        starts, reach = entry
+        # Intervals starting before `end` are candidates; the furthest
+        # reaching one decides whether any of them runs past `start`.
+        i = bisect_left(starts, end)
+        return i > 0 and reach[i - 1] > start
+
+
+class GridTemplate:
+    """Timetable grid geometry shared by the pages of one PDF.
+
+    Learned from the first pages that parse fully: where each day header
+    sits and the day columns derived from it, with the last column ending
+    at the page edge. Later pages whose day headers are where the template
+    says reuse its columns; other pages get the full column analysis.
+    """
+
+    SAMPLE_PAGES = 3
+    TOLERANCE = 1.0  # points
+
+    def __init__(self, headers, day_columns):
+        """Create a template.
+
+        Args:
+            headers: Day name to (x0, x1, top) of its header word
+            day_columns: Day name to {'x_start', 'x_end'} column range
+        """
+        self.headers = headers
+        self.day_columns = day_columns
+
+    @staticmethod
+    def day_headers(words):
+        """Positions of the day header words of a page.
+
+        Args:
+            words: Word records of the page
+
+        Returns:
+            dict: Day name to (x0, x1, top); the last occurrence wins, as
+            in `_extract_day_columns`
+        """
+        return {w.text: (w.x0, w.x1, w.top) for w in words
+                if w.text in ScheduleToJSON.DAY_NAMES}
+
+    def matches(self, headers):
+        """Check that a page has the same day headers at the same place.
+
+        Args:
+            headers: Result of `day_headers` for the page
+
+        Returns:
+            bool: True if the template's columns apply to the page
+        """
+        if headers.keys() != self.headers.keys():
+            return False
+        return all(
+            abs(a - b) <= self.TOLERANCE
+            for day, position in headers.items()
+            for a, b in zip(position, self.headers[day])
+        )
+
+    @classmethod
+    def learn(cls, samples, page_width):
+        """Build a template if the sample pages agree on the grid.
+
+        Args:
+            samples: (headers, day_columns) of the first parsed pages
+            page_width: Width of the pages, where the last column ends
+
+        Returns:
+            GridTemplate: The template, or None if the samples disagree
+        """
+        headers, day_columns = samples[0]
+        template = cls(headers, {day: dict(col)
+                                 for day, col in day_columns.items()})
+        if not all(template.matches(other) for other, _ in samples[1:]):
+            return None
+        last_day = max(day_columns, key=lambda d: day_columns[d]['x_start'])
+        template.day_columns[last_day]['x_end'] = page_width
+        return template
+
+
+class DatedSlotIndex:
+    """Lookup of the slot a class is in at a given date and minute.
+
+    Built over the expanded (class, date) occurrences of the weekly
+    templates. Each day is cut into fixed-size minute buckets listing the
+    slots that touch them, so a lookup is two dict reads and a check of at
+    most a couple of slots, independent of the schedule size.
+    """
+
+    BUCKET_MINUTES = 15
+
+    def __init__(self, schedules):
+        """Build the index.
+
+        Args:
+            schedules: Mapping of class name to schedule, as in
+                schedules.json (dates come from each class period)
+        """
+        self._buckets = {}
+        for class_name, day, slot in iter_dated_slots(schedules):
+            time_range = _parse_slot_time(slot.get('time'))
+            if not time_range:
+                continue
+            start, end = time_range
+            buckets = self._buckets.setdefault((class_name, day), {})
+            for bucket in range(start // self.BUCKET_MINUTES,
+                                (end - 1) // self.BUCKET_MINUTES + 1):
+                buckets.setdefault(bucket, []).append((start, end, slot))
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def slot_at(self, class_name, day, minute):
+        """Return the slot of a class covering a minute of a date.
+
+        Args:
+            class_name: Class name as in schedules.json
+            day: datetime.date of the occurrence
+            minute: Minutes since midnight
+
+        Returns:
+            dict: The slot (FREE markers included), or None if the class
+                has no slot then
+        """
+        buckets = self._buckets.get((class_name, day))
+        if buckets is None:
+            return None
+        for start, end, slot in buckets.get(minute // self.BUCKET_MINUTES,
+                                            ()):
+            if start <= minute < end:
+                return slot
+        return None
 
 
 class ScheduleToJSON:
@@ -32,15 +312,28 @@ class ScheduleToJSON:
     RAMADAN_AFTERNOON_START = 710  # 11:50 in minutes
     RAMADAN_AFTERNOON_END = 870    # 14:30 in minutes
 
-    def __init__(self, ramadan_mode=False):
+    def __init__(self, ramadan_mode=False, rules_file=None):
         """Initialize the parser.
 
         Args:
             ramadan_mode: If True, use Ramadan schedule times
+            rules_file: FREEWARNING rule file (default:
+                freewarning_rules.json next to this script)
         """
         self.schedules = {}
         self.class_rooms = {}  # Track primary room for each class
         self.ramadan_mode = ramadan_mode
+        self.rules_file = rules_file
+        self.source_pdf = None
+        self.total_pages = 0
+        self.skipped_pages = {}  # page number -> reason
+        self.duplicate_classes = {}  # class name -> duplicate page numbers
+        self.worker_cache_info = {}  # worker pid -> {helper: (hits, misses)}
+        self.grid_template = None  # learned by the page extraction
+        self._grid_samples = []
+        self.grid_pages = {}  # 'learned'/'template'/'full' -> page count
+        self.escalated_pages = {}  # page number -> why tiering escalated
+        self._export_ready = False
 
         # Set active time slots based on mode
         if ramadan_mode:
@@ -67,6 +360,21 @@ class ScheduleToJSON:
         Returns:
             str: Extracted text from all pages
         """
+        text = ''.join(self.iter_page_texts(pdf_path))
+        print("Extraction completed!")
+        return text
+
+    def iter_page_texts(self, pdf_path):
+        """Extract the text of a PDF one page at a time.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Yields:
+            str: Text of each page, in page order
+        """
+        import PyPDF2
+
         print(f"Loading PDF: {pdf_path}")
 
         with open(pdf_path, 'rb') as file:
@@ -74,129 +382,441 @@ class ScheduleToJSON:
             total_pages = len(pdf_reader.pages)
             print(f"Total pages: {total_pages}")
 
-            all_text = ""
             for i, page in enumerate(pdf_reader.pages, 1):
                 if i % 50 == 0:
                     print(f"Extracting... {i}/{total_pages} pages")
-                all_text += page.extract_text()
-
-            print("Extraction completed!")
-            return all_text
+                yield page.extract_text()
 
-    def parse_pdf_spatial(self, pdf_path):
+    def parse_pdf_spatial(self, pdf_path, workers=1,
+                          queue_depth=DEFAULT_QUEUE_DEPTH, trace=None,
+                          backend='pdfplumber', journal=None):
         """Parse schedules from PDF using spatial positioning.
 
-        Uses pdfplumber to extract words with their x,y positions,
-        allowing correct mapping of courses to days even when some
-        days are completely empty.
+        Uses an extraction backend (pdfplumber by default) to extract
+        words with their x,y positions, allowing correct mapping of
+        courses to days even when some days are completely empty.
 
         Args:
             pdf_path: Path to the PDF file
+            workers: Processes extracting pages; 1 extracts in-process
+            queue_depth: Most pages extracted ahead of assembly
+            trace: Optional StageTrace recording the stage timeline
+            backend: Extraction backend, a key of pdf_backends.BACKENDS
+            journal: Optional PageJournal checkpointing extracted pages
 
         Returns:
             dict: Parsed schedules organized by class
         """
-        print(f"Parsing PDF with spatial awareness: {pdf_path}")
-
-        skipped_pages = []
-        duplicate_classes = {}
+        cache_before = {name: helper.cache_info()
+                        for name, helper in CACHED_TEXT_HELPERS.items()}
+        for class_name, schedule, _ in self.iter_classes(
+                pdf_path, workers, queue_depth, trace, backend, journal):
+            self.schedules[class_name] = schedule
 
-        with pdfplumber.open(pdf_path) as pdf:
-            total_pages = len(pdf.pages)
-            print(f"Total pages in PDF: {total_pages}")
+        classes_found = len(self.schedules)
+        total_pages = self.total_pages
+        print(
+            f"\nAnalysis completed! {classes_found} classes found from {total_pages} pages.")
+        cache_rates = []
+        for name, helper in CACHED_TEXT_HELPERS.items():
+            info = helper.cache_info()
+            hits = info.hits - cache_before[name].hits
+            calls = hits + info.misses - cache_before[name].misses
+            # Worker processes keep caches of their own
+            for worker_info in self.worker_cache_info.values():
+                hits += worker_info[name][0]
+                calls += sum(worker_info[name])
+            if calls:
+                cache_rates.append(
+                    f"{name} {hits / calls:.0%} of {calls}")
+        if cache_rates:
+            print(f"  🧠 Cache hit rates: {', '.join(cache_rates)}")
+        if classes_found < total_pages:
+            missing_count = total_pages - classes_found
+            print(f"  ⚠ Warning: {missing_count} pages missing")
+            if self.skipped_pages:
+                print(f"  📄 Skipped pages:")
+                for page_number, reason in self.skipped_pages.items():
+                    print(f"     - page {page_number}: {reason}")
+            if self.duplicate_classes:
+                print(f"  🔄 Duplicate class names found (pages overwritten):")
+                for cls, pages in self.duplicate_classes.items():
+                    print(f"     - '{cls}' appears on pages: {pages}")
+        if self.grid_pages.get('template'):
+            print(f"  📐 Grid template: {self.grid_pages['template']} pages "
+                  f"matched, {self.grid_pages.get('full', 0)} needed full "
+                  f"column analysis")
+        if backend == 'tiered':
+            parsed = sum(self.grid_pages.values())
+            print(f"  🪜 Tiered extraction: "
+                  f"{parsed - len(self.escalated_pages)} pages kept from "
+                  f"pypdf2, {len(self.escalated_pages)} escalated to "
+                  f"pdfplumber")
+            for page_num, reason in sorted(self.escalated_pages.items()):
+                print(f"     - page {page_num}: {reason}")
+        return self.schedules
 
-            for page_num, page in enumerate(pdf.pages):
-                words = page.extract_words()
+    def iter_classes(self, pdf_path, workers=1,
+                     queue_depth=DEFAULT_QUEUE_DEPTH, trace=None,
+                     backend='pdfplumber', journal=None):
+        """Parse a PDF page by page, yielding each class as its page is done.
 
-                if not words:
-                    skipped_pages.append(page_num + 1)
-                    print(f"  ⚠ Page {page_num + 1} skipped - no words found")
-                    continue
+        Nothing is stored in `self.schedules`, so callers can stream classes
+        into an index, a database or NDJSON without holding the whole
+        document, and stop early once they have what they need. Room usage
+        is still tracked in `self.class_rooms`, but FREE slots are not yet
+        reviewed against other classes since that needs every class.
 
-                # Extract class name from words
-                class_name = self._extract_class_name_from_words(
-                    words, page_num + 1)
-                if not class_name:
-                    skipped_pages.append(page_num + 1)
-                    # Debug: print first few words to see what's on this page
-                    if len(words) > 0:
-                        first_words = ' '.join([w['text'] for w in words[:20]])
-                        print(
-                            f"  ⚠ Page {page_num + 1} skipped - no class name found. First words: {first_words[:100]}...")
-                    continue
+        Args:
+            pdf_path: Path to the PDF file
+            workers: Processes extracting pages; 1 extracts in-process
+            queue_depth: Most pages extracted ahead of assembly
+            trace: Optional StageTrace recording the stage timeline
+            backend: Extraction backend, a key of pdf_backends.BACKENDS
+            journal: Optional PageJournal; each extracted page is recorded
+                in it, and pages it holds from an earlier run are
+                assembled again without being extracted
+
+        Yields:
+            tuple: (class_name, schedule, page_num) for each timetable page
+        """
+        from export_pipeline import PageExtractor
 
-                # Extract day columns (x-coordinates for each day)
-                day_columns = self._extract_day_columns(words)
-                if not day_columns:
-                    skipped_pages.append(page_num + 1)
-                    print(
-                        f"  ⚠ Page {page_num + 1} skipped - no day columns found (class: {class_name})")
+        print(f"Parsing PDF with spatial awareness: {pdf_path}")
+        self.source_pdf = str(pdf_path)
+        self.skipped_pages = {}  # page number -> reason
+        self.duplicate_classes = {}
+        self.escalated_pages = {}
+        seen_classes = set(self.schedules)
+        done = journal.load() if journal else {}
+        if journal:
+            journal.open(done)
+            if done:
+                print(f"Resuming from {journal.path}: {len(done)} pages "
+                      f"already extracted")
+
+        with PageExtractor(pdf_path, self._extract_page, workers,
+                           queue_depth, trace, backend, done) as pages:
+            self.total_pages = len(pages)
+            print(f"Total pages in PDF: {self.total_pages}")
+            if workers > 1:
+                print(f"Extracting pages with {workers} workers "
+                      f"(queue depth {queue_depth})")
+
+            for page_num, extracted in pages:
+                if journal and page_num not in done:
+                    journal.record(page_num, extracted)
+                if trace:
+                    with trace.span('assemble', f"page {page_num}"):
+                        parsed = self._assemble_page(page_num, extracted)
+                else:
+                    parsed = self._assemble_page(page_num, extracted)
+                if not parsed:
                     continue
+                class_name, schedule = parsed
 
                 # Check for duplicate class names
-                if class_name in self.schedules:
-                    if class_name not in duplicate_classes:
-                        duplicate_classes[class_name] = []
-                    duplicate_classes[class_name].append(page_num + 1)
+                if class_name in seen_classes:
+                    if class_name not in self.duplicate_classes:
+                        self.duplicate_classes[class_name] = []
+                    self.duplicate_classes[class_name].append(page_num)
                     print(
-                        f"  ⚠ Page {page_num + 1} - DUPLICATE class name '{class_name}' (will overwrite previous)")
+                        f"  ⚠ Page {page_num} - DUPLICATE class name '{class_name}' (will overwrite previous)")
+                seen_classes.add(class_name)
 
-                # Extract metadata
-                metadata = self._extract_metadata_from_words(words)
+                yield class_name, schedule, page_num
 
-                # Initialize schedule
-                self.schedules[class_name] = {
-                    'days': {},
-                    'metadata': metadata
-                }
+            self.worker_cache_info = pages.worker_cache_info
 
-                # Extract courses with their positions
-                courses = self._extract_courses_with_positions(
-                    words, day_columns)
+    def _extract_page(self, page, page_num):
+        """Extract the courses of a page, without touching parser state.
 
-                # Assign courses to days based on x-position
-                self._assign_courses_by_position(
-                    class_name, courses, day_columns)
+        This is the expensive part of page parsing, so the export pipeline
+        runs it in worker processes.
 
-        classes_found = len(self.schedules)
-        print(
-            f"\nAnalysis completed! {classes_found} classes found from {total_pages} pages.")
-        if classes_found < total_pages:
-            missing_count = total_pages - classes_found
-            print(f"  ⚠ Warning: {missing_count} pages missing")
-            if skipped_pages:
-                print(f"  📄 Skipped page numbers: {skipped_pages}")
-            if duplicate_classes:
-                print(f"  🔄 Duplicate class names found (pages overwritten):")
-                for cls, pages in duplicate_classes.items():
-                    print(f"     - '{cls}' appears on pages: {pages}")
-        return self.schedules
+        Args:
+            page: Page of an extraction backend
+            page_num: 1-based page number
+
+        Returns:
+            tuple: (class_name, metadata, courses, day_columns, grid,
+            escalation) where grid tells how the day columns were found
+            ('learned', 'template' or 'full') and escalation why a tiered
+            page was re-read by its full backend (None if it was not), or
+            a str with the reason the page is skipped
+        """
+        # Cheap pre-filter on the raw content stream so cover,
+        # annex and blank pages never pay for word extraction; replayed
+        # pages carry the verdict recorded with them
+        if isinstance(page, FixturePage):
+            skip_reason = page.skip_reason
+        else:
+            skip_reason = self._prefilter_page(page)
+        if skip_reason:
+            print(f"  ⚠ Page {page_num} skipped - {skip_reason}")
+            page.close()
+            return skip_reason
+
+        if isinstance(page, TieredPage):
+            return self._extract_tiered_page(page, page_num)
+        return self._extract_page_words(page.words(), page_num, page.width)
+
+    def _extract_tiered_page(self, page, page_num):
+        """Extract a page with its cheap tier, escalating when in doubt.
+
+        The cheap tier's result is kept only if `_tier_problem` finds
+        nothing wrong with it; otherwise the grid learning state is put
+        back as it was and the page is extracted again by the full
+        backend, and only that attempt's messages are printed.
+
+        Args:
+            page: TieredPage
+            page_num: 1-based page number
+
+        Returns:
+            Same as `_extract_page`
+        """
+        log = io.StringIO()
+        # A rejected cheap pass must not teach the shared grid template
+        grid_state = (self.grid_template, list(self._grid_samples))
+        try:
+            with redirect_stdout(log):
+                words = page.cheap.words()
+                extracted = self._extract_page_words(
+                    words, page_num, page.width)
+            escalation = self._tier_problem(extracted, words)
+        except ValueError as e:
+            escalation = str(e)
+
+        if escalation is None:
+            page.full.close()
+            sys.stdout.write(log.getvalue())
+            return extracted
+
+        self.grid_template, self._grid_samples = grid_state
+        extracted = self._extract_page_words(
+            page.full.words(), page_num, page.width)
+        if isinstance(extracted, str):
+            return extracted
+        return extracted[:-1] + (escalation,)
+
+    def _tier_problem(self, extracted, words):
+        """Check a cheap-tier extraction before trusting it.
+
+        The page's time markers are checked against its slots: the hour
+        labels of the time axis ('09h'...'17h') must run without a gap,
+        every slot needs both its start and end time in its day column,
+        and no course may fall outside the hour axis. Slots dropped for
+        lacking a room are not counted as lost, since the full backend
+        drops them too.
+
+        Args:
+            extracted: Result of `_extract_page_words`
+            words: Word records the extraction was made from
+
+        Returns:
+            str: Why the page needs the full backend, or None if the
+            extraction has every day column, consistent time markers and
+            no overlapping courses
+        """
+        if isinstance(extracted, str):
+            return extracted
+        courses, day_columns = extracted[2], extracted[3]
+
+        missing = [day for day in self.DAY_NAMES if day not in day_columns]
+        if missing:
+            return f"no column for {', '.join(missing)}"
+
+        hours = sorted({int(w.text[:2]) for w in words
+                        if HOUR_MARKER_PATTERN.match(w.text)})
+        if len(hours) < 2:
+            return "no time axis"
+        gaps = [hour for hour in range(hours[0], hours[-1])
+                 if hour not in hours]
+        if gaps:
+            return "time axis misses " + ", ".join(
+                f"{hour:02d}h" for hour in gaps)
+
+        time_words = Counter()
+        for w in words:
+            if CLOCK_MARKER_PATTERN.match(w.text):
+                for day, col in day_columns.items():
+                    if col['x_start'] <= w.x0 <= col['x_end']:
+                        time_words[day] += 1
+                        break
+        odd = [day for day in self.DAY_NAMES if time_words[day] % 2]
+        if odd:
+            return f"unpaired slot times on {', '.join(odd)}"
+
+        ranges = {}
+        for course in courses:
+            time_range = _parse_slot_time(course['time'])
+            if time_range is None:
+                return f"unreadable time {course['time']!r}"
+            if not (hours[0] * 60 <= time_range[0]
+                    and time_range[1] <= (hours[-1] + 1) * 60):
+                return f"{course['time']} outside the time axis"
+            ranges.setdefault(course['day'], []).append(time_range)
+        for day, day_ranges in ranges.items():
+            day_ranges.sort()
+            if any(later[0] < earlier[1]
+                   for earlier, later in zip(day_ranges, day_ranges[1:])):
+                return f"overlapping courses on {day}"
+        return None
+
+    def _extract_page_words(self, words, page_num, page_width):
+        """Extract the courses of a page from its words.
+
+        Args:
+            words: Word records of the page
+            page_num: 1-based page number
+            page_width: Page width, where the last day column ends
+
+        Returns:
+            Same as `_extract_page`
+        """
+        if not words:
+            print(f"  ⚠ Page {page_num} skipped - no words found")
+            return "no words found"
+
+        # Extract class name from words
+        class_name = self._extract_class_name_from_words(words, page_num)
+        if not class_name:
+            # Debug: print first few words to see what's on this page
+            first_words = ' '.join([w.text for w in words[:20]])
+            print(
+                f"  ⚠ Page {page_num} skipped - no class name found. First words: {first_words[:100]}...")
+            return "no class name found"
+
+        # Reuse the learned grid when the day headers are where it says,
+        # otherwise extract day columns (x-coordinates for each day)
+        headers = GridTemplate.day_headers(words)
+        if self.grid_template and self.grid_template.matches(headers):
+            day_columns = self.grid_template.day_columns
+            grid = 'template'
+        else:
+            day_columns = self._extract_day_columns(words)
+            grid = 'full'
+        if not day_columns:
+            print(
+                f"  ⚠ Page {page_num} skipped - no day columns found (class: {class_name})")
+            return f"no day columns found (class: {class_name})"
+
+        if not self.grid_template and len(self._grid_samples) < \
+                GridTemplate.SAMPLE_PAGES:
+            self._grid_samples.append((headers, day_columns))
+            grid = 'learned'
+            if len(self._grid_samples) == GridTemplate.SAMPLE_PAGES:
+                self.grid_template = GridTemplate.learn(
+                    self._grid_samples, page_width)
+
+        # Extract courses with their positions
+        courses = self._extract_courses_with_positions(words, day_columns)
+
+        return (class_name, self._extract_metadata_from_words(words),
+                courses, day_columns, grid, None)
+
+    def _assemble_page(self, page_num, extracted):
+        """Build the schedule of an extracted page.
+
+        Pages must be assembled in page order: FREE slots take the primary
+        room tallied so far, which spans every earlier page of the class.
+
+        Args:
+            page_num: 1-based page number
+            extracted: Result of `_extract_page`
+
+        Returns:
+            tuple: (class_name, schedule), or None if the page was skipped
+            (the reason is recorded in `self.skipped_pages`)
+        """
+        if isinstance(extracted, str):
+            self.skipped_pages[page_num] = extracted
+            return None
+
+        class_name, metadata, courses, day_columns, grid, escalation = \
+            extracted
+        self.grid_pages[grid] = self.grid_pages.get(grid, 0) + 1
+        if escalation:
+            self.escalated_pages[page_num] = escalation
+        schedule = {'days': {}, 'metadata': metadata}
+
+        # Assign courses to days based on x-position
+        self._assign_courses_by_position(
+            class_name, schedule, courses, day_columns)
+
+        return class_name, schedule
+
+    def _prefilter_page(self, page):
+        """Decide from the raw content stream whether to skip a page.
+
+        Timetable pages carry an 'Emploi du Temps' title and day headers.
+        The text operands of the page content stream are checked for both
+        before any layout analysis, which is where pdfplumber spends
+        nearly all of its time.
+
+        Args:
+            page: Page of an extraction backend
+
+        Returns:
+            str: Reason to skip the page, or None if it looks like a
+            timetable page, the stream text cannot be read directly
+            (e.g. fonts with custom glyph encodings) or the page paints
+            XObjects that may hold its text
+        """
+        try:
+            data = page.content_stream()
+        except Exception:
+            return None
+
+        chunks = []
+        for literal, hex_string in PDF_STRING_PATTERN.findall(data):
+            if hex_string:
+                hex_digits = re.sub(rb'\s', b'', hex_string)
+                chunks.append(bytes.fromhex(
+                    (hex_digits + b'0' * (len(hex_digits) % 2)).decode()))
+            else:
+                chunks.append(re.sub(rb'\\([()\\])', rb'\1', literal))
+        text = b''.join(chunks).decode('latin-1')
+
+        compact = re.sub(r'\s+', '', text)
+        if not compact:
+            reason = "blank page (no text)"
+        elif sum(1 for char in text if char.isprintable()) < 0.9 * len(text):
+            return None
+        elif 'EmploiduTemps' not in compact:
+            reason = "not a timetable page (no 'Emploi du Temps' title)"
+        elif not any(day_name in compact for day_name in self.DAY_NAMES):
+            reason = "not a timetable page (no day headers)"
+        else:
+            return None
+
+        # Text drawn through Form XObjects is not in the page's own stream,
+        # so a page painting any XObject is left to full extraction
+        if XOBJECT_DO_PATTERN.search(data):
+            return None
+        return reason
 
     def _extract_class_name_from_words(self, words, page_num=0):
         """Extract class name from words list."""
         # Look for pattern like "4SAE11" or "4ARCTIC9" near "Emploi du Temps"
         candidates = []
 
+        # Positions of the "Emploi du Temps" title words, found once per page
+        anchors = [j for j, w in enumerate(words)
+                   if 'Emploi' in w.text or 'Temps' in w.text]
+
         for i, w in enumerate(words):
-            text = w['text'].strip()
-            # Class names patterns (allow accented characters like é, à, è, ô):
-            # - \d[\w-]+\d+ : like 4SAE11, 3IA2, 4ERP-BI1, 4GamiX1, 4MécaT1
-            # - \d[\w-]+ : like 3A1, 4A (ending with just letters)
-            # - [\w]+\d+ : like PREPA1, SLEAM2
-            # - \d+[\w-]+\d* : More flexible digit-letter combos
-            # Using \w which matches [A-Za-z0-9_] plus Unicode letters (like é, à, etc)
-            if (re.match(r'^\d[\w-]+\d*$', text, re.UNICODE) or
-                re.match(r'^[\w]+\d+$', text, re.UNICODE | re.IGNORECASE) or
-                    re.match(r'^\d+[\w-]+$', text, re.UNICODE)):
+            text = w.text.strip()
+            if looks_like_class_name(text):
                 # Prioritize entries near "Emploi" or at start of page
                 priority = 0
                 if i < 30:  # Near start of page
                     priority += 10
-                # Check if near "Emploi" keyword
-                for j in range(max(0, i-5), min(len(words), i+5)):
-                    if 'Emploi' in words[j]['text'] or 'Temps' in words[j]['text']:
-                        priority += 20
-                        break
+                # Check for an anchor among the words i-5 .. i+4
+                k = bisect_left(anchors, i - 5)
+                if k < len(anchors) and anchors[k] < i + 5:
+                    priority += 20
                 candidates.append((priority, text))
 
         if candidates:
@@ -206,7 +826,7 @@ class ScheduleToJSON:
 
         # If no candidates found, log all words for debugging
         if page_num > 0:
-            all_text = ' '.join([w['text'] for w in words[:30]])
+            all_text = ' '.join([w.text for w in words[:30]])
             print(
                 f"  [Page {page_num}] No class name pattern found in: {all_text[:150]}...")
 
@@ -220,11 +840,11 @@ class ScheduleToJSON:
         day_positions = {}
 
         for w in words:
-            if w['text'] in self.DAY_NAMES:
-                day_positions[w['text']] = {
-                    'x_center': (w['x0'] + w['x1']) / 2,
-                    'x0': w['x0'],
-                    'x1': w['x1']
+            if w.text in self.DAY_NAMES:
+                day_positions[w.text] = {
+                    'x_center': (w.x0 + w.x1) / 2,
+                    'x0': w.x0,
+                    'x1': w.x1
                 }
 
         if not day_positions:
@@ -262,14 +882,14 @@ class ScheduleToJSON:
 
         for i, w in enumerate(words):
             # Look for year pattern
-            if re.match(r'\d{4}/\d{4}', w['text']):
-                metadata['year'] = w['text']
+            if re.match(r'\d{4}/\d{4}', w.text):
+                metadata['year'] = w.text
             # Look for date range
-            elif re.match(r'\d{2}/\d{2}/\d{4}', w['text']):
+            elif re.match(r'\d{2}/\d{2}/\d{4}', w.text):
                 if 'period' not in metadata:
-                    metadata['period'] = w['text']
+                    metadata['period'] = w.text
                 else:
-                    metadata['period'] += f" - {w['text']}"
+                    metadata['period'] += f" - {w.text}"
 
         return metadata
 
@@ -284,7 +904,7 @@ class ScheduleToJSON:
         # Find all time patterns (09:00 - 12:15 or 13:30 - 16:45)
         time_words = []
         for w in words:
-            if re.match(r'\d{2}:\d{2}', w['text']):
+            if re.match(r'\d{2}:\d{2}', w.text):
                 time_words.append(w)
 
         # Group time words into pairs (start-end)
@@ -296,17 +916,25 @@ class ScheduleToJSON:
             if i + 1 < len(time_words):
                 end_time = time_words[i + 1]
                 # Verify they're close together (same time block)
-                if abs(start_time['top'] - end_time['top']) < 10:
+                if abs(start_time.top - end_time.top) < 10:
                     time_blocks.append({
-                        'start': start_time['text'],
-                        'end': end_time['text'],
-                        'x': (start_time['x0'] + end_time['x1']) / 2,
-                        'y': start_time['top']
+                        'start': start_time.text,
+                        'end': end_time.text,
+                        'x': (start_time.x0 + end_time.x1) / 2,
+                        'y': start_time.top
                     })
                     i += 2
                     continue
             i += 1
 
+        # Words of each day column, in page order, gathered once per page
+        # (a word exactly on a boundary belongs to both columns)
+        column_words = {day: [] for day in day_columns}
+        for w in words:
+            for day, col in day_columns.items():
+                if col['x_start'] <= w.x0 <= col['x_end']:
+                    column_words[day].append(w)
+
         # For each time block, find associated course name and room
         for time_block in time_blocks:
             x = time_block['x']
@@ -326,43 +954,39 @@ class ScheduleToJSON:
             course_words = []
             room = None
 
-            for w in words:
-                # Word should be in same column
-                if not (day_columns[day_name]['x_start'] <= w['x0'] <= day_columns[day_name]['x_end']):
-                    continue
-
+            for w in column_words[day_name]:
                 # Word should be above or at same level as time
-                if w['top'] > y + 20:  # Allow some tolerance
+                if w.top > y + 20:  # Allow some tolerance
                     continue
-                if w['top'] < y - 150:  # Not too far above
+                if w.top < y - 150:  # Not too far above
                     continue
 
                 # Check if it's a room
-                if re.match(r'^[A-Z]\d+$', w['text']):
-                    room = w['text']
+                if re.match(r'^[A-Z]\d+$', w.text):
+                    room = w.text
                 # Check if it's "En ligne"
-                elif w['text'].lower() == 'en' or w['text'].lower() == 'ligne':
+                elif w.text.lower() == 'en' or w.text.lower() == 'ligne':
                     room = 'En Ligne'
                 # Check if it's the time itself or hour markers
-                elif re.match(r'\d{2}:\d{2}', w['text']) or re.match(r'^\d{2}h$', w['text']):
+                elif re.match(r'\d{2}:\d{2}', w.text) or re.match(r'^\d{2}h$', w.text):
                     continue
                 # Skip day names
-                elif w['text'] in self.DAY_NAMES:
+                elif w.text in self.DAY_NAMES:
                     continue
                 # Skip date patterns like "15/12" or "20/12"
-                elif re.match(r'^\d{2}/\d{2}$', w['text']):
+                elif re.match(r'^\d{2}/\d{2}$', w.text):
                     continue
                 # Skip full date patterns like "14/12/2025"
-                elif re.match(r'^\d{2}/\d{2}/\d{4}$', w['text']):
+                elif re.match(r'^\d{2}/\d{2}/\d{4}$', w.text):
                     continue
                 # Otherwise it might be part of course name
-                elif w['text'] not in ['-']:
+                elif w.text not in ['-']:
                     course_words.append(w)
 
             # Build course name from words (sorted by y then x position)
             if course_words:
-                course_words.sort(key=lambda w: (w['top'], w['x0']))
-                course_name = ' '.join(w['text'] for w in course_words)
+                course_words.sort(key=lambda w: (w.top, w.x0))
+                course_name = ' '.join(w.text for w in course_words)
                 course_name = self._clean_course_name(course_name)
             else:
                 course_name = None
@@ -383,10 +1007,11 @@ class ScheduleToJSON:
 
         return courses
 
-    def _assign_courses_by_position(self, class_name, courses, day_columns):
-        """Assign courses to days based on their x-position."""
+    def _assign_courses_by_position(self, class_name, schedule, courses,
+                                    day_columns):
+        """Assign courses to the days of `schedule` based on x-position."""
         # Get days info for full date keys
-        year = self.schedules[class_name]['metadata'].get(
+        year = schedule['metadata'].get(
             'period', '').split('/')[-1][:4] or '2025'
 
         # Create schedule for each day
@@ -441,7 +1066,7 @@ class ScheduleToJSON:
             filled = self._fill_empty_time_slots_multi(
                 day_schedule, class_name)
             if filled:
-                self.schedules[class_name]['days'][day_key] = filled
+                schedule['days'][day_key] = filled
 
     def parse_pdf_text(self, text):
         """Parse schedules from PDF text.
@@ -866,22 +1491,15 @@ class ScheduleToJSON:
     def _clean_course_name(self, course_name):
         """Clean course name by removing unwanted elements.
 
+        Memoized through the module-level clean_course_name().
+
         Args:
             course_name: Raw course name
 
         Returns:
             str: Cleaned course name
         """
-        # Remove years (2025, etc.)
-        course_name = re.sub(r'\b\d{4}\b', '', course_name)
-        # Remove time references like "17h", "16h" - with or without word boundary
-        # This handles cases like "17hARCHITECTURE" -> "ARCHITECTURE"
-        course_name = re.sub(r'^\d{2}h', '', course_name)  # At start
-        # In middle with space before
-        course_name = re.sub(r'\s\d{2}h\b', '', course_name)
-        # Clean up whitespace
-        course_name = re.sub(r'\s+', ' ', course_name).strip()
-        return course_name
+        return clean_course_name(course_name)
 
     def _parse_courses_for_day(self, page, day_name, class_name):
         """Extract courses for a specific day from the table format.
@@ -1174,37 +1792,52 @@ class ScheduleToJSON:
             return hours * 60 + minutes
         return 0
 
-    def _review_free_slots(self):
+    def _review_free_slots(self, on_class_reviewed=None):
         """Review FREE slots to check if rooms are occupied by other classes.
 
+        The occupancy index needs every class, so it is the one barrier of
+        the export; after it each class is final as soon as its own FREE
+        slots are reviewed.
+
+        Args:
+            on_class_reviewed: Optional callback(class_name, schedule)
+                called as each class is done
+
         Returns:
             int: Number of changes made
         """
         print("\nReviewing FREE slots...")
 
-        room_occupancy = self._build_room_occupancy_map()
+        room_occupancy = self._build_room_occupancy_index()
+        warning_rules = self.warning_rules()
         changes_made = 0
         warning_made = 0
 
         for class_name, class_data in self.schedules.items():
+            dates = week_dates(class_data['metadata'].get('period'))
             for day_key, courses in class_data['days'].items():
+                day_name = day_key.split(' ')[0]
                 for course in courses:
-                    if course['course'] == 'FREE':
-                        if self._is_room_occupied(
-                            course['room'],
-                            day_key,
-                            course['time'],
-                            room_occupancy
-                        ):
-                            course['course'] = 'NOT-FREE'
-                            changes_made += 1
-                        elif self._is_free_warning(
-                            course['room'],
-                            day_key,
-                            course['time']
-                        ):
-                            course['course'] = 'FREEWARNING'
-                            warning_made += 1
+                    if course['course'] != 'FREE':
+                        continue
+                    free_range = self._time_range_to_minutes(course['time'])
+                    if not free_range:
+                        continue
+                    if room_occupancy.is_occupied(
+                        course['room'], day_key, *free_range
+                    ):
+                        course['course'] = 'NOT-FREE'
+                        changes_made += 1
+                    elif warning_rules.matches(
+                        course['room'],
+                        day_name,
+                        *free_range,
+                        dates.get(day_name)
+                    ):
+                        course['course'] = 'FREEWARNING'
+                        warning_made += 1
+            if on_class_reviewed:
+                on_class_reviewed(class_name, class_data)
 
         print(
             f"✓ Review completed: {changes_made} FREE slots changed to "
@@ -1212,169 +1845,815 @@ class ScheduleToJSON:
         )
         return changes_made
 
-    def _build_room_occupancy_map(self):
-        """Build a map of room occupancy across all classes.
+    def _build_room_occupancy_index(self):
+        """Build an interval index of room occupancy across all classes.
 
         Returns:
-            dict: Room occupancy mapping
+            RoomOccupancyIndex: Occupied ranges keyed by room and day
         """
-        room_occupancy = {}
+        def occupied_intervals():
+            for class_data in self.schedules.values():
+                for day_key, courses in class_data['days'].items():
+                    for course in courses:
+                        if course['course'] == 'FREE':
+                            continue
+                        time_range = self._time_range_to_minutes(
+                            course['time'])
+                        if time_range:
+                            yield (course['room'], day_key) + time_range
+
+        return RoomOccupancyIndex(occupied_intervals())
+
+    def _time_range_to_minutes(self, time_range):
+        """Convert a range like '09H:00-12H:15' to (start, end) minutes.
 
-        for class_name, class_data in self.schedules.items():
-            for day_key, courses in class_data['days'].items():
-                for course in courses:
-                    if course['course'] != 'FREE':
-                        room = course['room']
-                        time = course['time']
+        Args:
+            time_range: Time range string
 
-                        if room not in room_occupancy:
-                            room_occupancy[room] = {}
-                        if day_key not in room_occupancy[room]:
-                            room_occupancy[room][day_key] = {}
-                        if time not in room_occupancy[room][day_key]:
-                            room_occupancy[room][day_key][time] = []
+        Returns:
+            tuple: (start, end) in minutes, or None if malformed
+        """
+        time_parts = re.findall(self.TIME_PATTERN, time_range)
+        if len(time_parts) < 2:
+            return None
+        return (self._time_to_minutes(time_parts[0]),
+                self._time_to_minutes(time_parts[1]))
 
-                        room_occupancy[room][day_key][time].append(
-                            class_name
-                        )
+    def warning_rules(self):
+        """Compiled FREEWARNING rules for the active time slots.
 
-        return room_occupancy
+        The rule file is compiled once and recompiled only when it changes
+        on disk, so calling this again picks up edited rules.
 
-    def _is_room_occupied(self, room, day_key, free_time, room_occupancy):
-        """Check if a room is occupied during a FREE time slot.
+        Returns:
+            WarningRules: Rules resolving 'morning'/'afternoon' windows
+                to this parser's sessions
+        """
+        return load_rules(self.rules_file, {
+            'morning': (self.MORNING_START, self.MORNING_END),
+            'afternoon': (self.AFTERNOON_START, self.AFTERNOON_END),
+        })
+
+    def for_time_profile(self, ramadan_mode):
+        """Copy the parsed schedules with FREE slots of another time profile.
+
+        The spatial parser decides where FREE slots go from course start
+        hours alone; only the FREE slot times depend on the profile. A
+        variant therefore reuses the course data of this parse and just
+        re-times its FREE slots, then gets its own review on export.
 
         Args:
-            room: Room identifier
-            day_key: Day key string
-            free_time: Time range of the FREE slot
-            room_occupancy: Dictionary of room occupancy data
+            ramadan_mode: Time profile of the variant
 
         Returns:
-            bool: True if room is occupied
+            ScheduleToJSON: Parser holding the variant, ready to export
+
+        Raises:
+            ValueError: If this parser's FREE slots were already reviewed
         """
-        if room not in room_occupancy:
-            return False
-        if day_key not in room_occupancy[room]:
-            return False
+        if self._export_ready:
+            raise ValueError(
+                "Time profile variants must be made before export")
+
+        variant = ScheduleToJSON(ramadan_mode=ramadan_mode,
+                                 rules_file=self.rules_file)
+        free_times = {
+            self.MORNING_SLOT: variant.MORNING_SLOT,
+            self.AFTERNOON_SLOT: variant.AFTERNOON_SLOT,
+        }
 
-        free_time_parts = re.findall(self.TIME_PATTERN, free_time)
-        if len(free_time_parts) < 2:
-            return False
+        for class_name, schedule in self.schedules.items():
+            days = {}
+            for day_key, slots in schedule['days'].items():
+                days[day_key] = []
+                for slot in slots:
+                    slot = dict(slot)
+                    if slot['course'] == 'FREE':
+                        slot['time'] = free_times.get(slot['time'],
+                                                      slot['time'])
+                    days[day_key].append(slot)
+            variant.schedules[class_name] = {
+                'days': days,
+                'metadata': dict(schedule['metadata']),
+            }
+            variant.class_rooms[class_name] = dict(
+                self.class_rooms.get(class_name, {}))
 
-        free_start = self._time_to_minutes(free_time_parts[0])
-        free_end = self._time_to_minutes(free_time_parts[1])
+        variant.source_pdf = self.source_pdf
+        variant.total_pages = self.total_pages
+        variant.skipped_pages = dict(self.skipped_pages)
+        variant.duplicate_classes = dict(self.duplicate_classes)
+        return variant
 
-        for scheduled_time in room_occupancy[room][day_key].keys():
-            scheduled_parts = re.findall(self.TIME_PATTERN, scheduled_time)
-            if len(scheduled_parts) < 2:
-                continue
+    def _prepare_export(self, on_class_ready=None):
+        """Add primary rooms and dates to metadata, review FREE slots, once.
 
-            scheduled_start = self._time_to_minutes(scheduled_parts[0])
-            scheduled_end = self._time_to_minutes(scheduled_parts[1])
+        The review must run only once: afterwards NOT-FREE and FREEWARNING
+        entries would count as occupied rooms.
 
-            if self._times_overlap(
-                free_start,
-                free_end,
-                scheduled_start,
-                scheduled_end
-            ):
-                return True
+        Args:
+            on_class_ready: Optional callback(class_name, schedule) called
+                for each class, in order, once it is final
+        """
+        if self._export_ready:
+            if on_class_ready:
+                for class_name, schedule in self.schedules.items():
+                    on_class_ready(class_name, schedule)
+            return
+
+        # Add primary room and the dates of the weekly template to metadata
+        for class_name, schedule in self.schedules.items():
+            metadata = schedule['metadata']
+            metadata['primary_room'] = self._get_primary_room(class_name)
+            dates = schedule_dates(schedule)
+            if dates:
+                metadata['dates'] = {
+                    day_key: day.isoformat() for day_key, day in dates.items()
+                }
 
-        return False
+        # Review FREE slots to ensure accuracy
+        self._review_free_slots(on_class_ready)
+        self._export_ready = True
 
-    def _times_overlap(self, start1, end1, start2, end2):
-        """Check if two time ranges overlap.
+    def export_to_json(self, output_file, queue_depth=DEFAULT_QUEUE_DEPTH,
+                       trace=None, publish=False):
+        """Export schedules to JSON file.
 
-        Args:
-            start1: Start time of first range (minutes)
-            end1: End time of first range (minutes)
-            start2: Start time of second range (minutes)
-            end2: End time of second range (minutes)
+        Classes are handed to a writer thread as soon as their review is
+        done, so encoding and file I/O overlap with the rest of the review.
 
-        Returns:
-            bool: True if ranges overlap
+        Args:
+            output_file: Path to output JSON file
+            queue_depth: Most reviewed classes waiting for the writer
+            trace: Optional StageTrace recording the stage timeline
+            publish: Also refresh the room registry, the per-class and
+                per-room shards and the manifest next to the output; only
+                for the export the web app serves
         """
-        return start1 < end2 and start2 < end1
+        from export_pipeline import JSONStreamWriter
 
-    def _is_free_warning(self, room, day_key, time):
-        """Check if a FREE slot should be marked as FREEWARNING.
+        with JSONStreamWriter(output_file, queue_depth, trace) as writer:
+            if trace:
+                with trace.span('review', 'FREE-slot review'):
+                    self._prepare_export(writer.put)
+            else:
+                self._prepare_export(writer.put)
 
-        Rules:
-        1. All A1X rooms (1st floor) are FREEWARNING
-        2. All C0X rooms on Wednesday 13:30-16:45 are FREEWARNING
+        print(f"\n✓ Schedules exported to: {output_file}")
+        print(f"✓ Total classes exported: {len(self.schedules)}")
 
-        Args:
-            room: Room identifier
-            day_key: Day key string
-            time: Time range string
+        report_file = conflict_report_path(output_file)
+        self.export_conflict_report(report_file)
+
+        if publish:
+            registry_file = Path(output_file).with_name(REGISTRY_FILE)
+            room_count = write_room_registry(self.schedules, registry_file)
+            print(f"✓ Room registry ({room_count} rooms) written to: "
+                  f"{registry_file}")
+            shard_dir = shard_directory(output_file)
+            stats = write_schedule_shards(self.schedules, shard_dir)
+            print(f"✓ Shards written to: {shard_dir}/ ({stats.written} "
+                  f"written, {stats.unchanged} unchanged, {stats.removed} "
+                  f"removed)")
+            manifest_file = update_manifest(Path(output_file).parent, {
+                output_file: {'classes': self.schedules,
+                              'rooms': room_shards(self.schedules)},
+                report_file: None,
+                registry_file: None,
+            })
+            print(f"✓ Manifest written to: {manifest_file}")
+
+    def export_conflict_report(self, report_file):
+        """Write the room conflict report of the current schedules.
 
-        Returns:
-            bool: True if should be marked as FREEWARNING
+        Args:
+            report_file: Path to the output report JSON file
         """
-        # Check if room is A1X (first floor)
-        if room.startswith('A1'):
-            return True
+        conflicts = find_room_conflicts(self.schedules)
+        joint_sessions = sum(
+            1 for conflict in conflicts if conflict['kind'] == 'joint-session')
+        report = {
+            'source_pdf': self.source_pdf,
+            'conflict_count': len(conflicts) - joint_sessions,
+            'joint_session_count': joint_sessions,
+            'conflicts': conflicts,
+        }
 
-        # Check if room is C0X on Wednesday afternoon
-        if room.startswith('C0'):
-            day_name = day_key.split(' ')[0]
-
-            if day_name == 'Mercredi':
-                time_parts = re.findall(self.TIME_PATTERN, time)
-                if len(time_parts) >= 2:
-                    start_minutes = self._time_to_minutes(time_parts[0])
-                    end_minutes = self._time_to_minutes(time_parts[1])
-
-                    # Check overlap with afternoon slot (13:30-16:45)
-                    if self._times_overlap(
-                        start_minutes,
-                        end_minutes,
-                        self.AFTERNOON_START,
-                        self.AFTERNOON_END
-                    ):
-                        return True
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
 
-        return False
+        print(f"✓ Room conflicts: {report['conflict_count']} "
+              f"(+{joint_sessions} joint sessions) written to: {report_file}")
 
-    def export_to_json(self, output_file):
-        """Export schedules to JSON file.
+    def export_to_sqlite(self, db_file):
+        """Export schedules to a SQLite database.
+
+        Classes whose content did not change since the last export into
+        the same database are left untouched.
 
         Args:
-            output_file: Path to output JSON file
+            db_file: Path to the SQLite database (created if missing)
         """
-        # Add primary room to metadata
-        for class_name in self.schedules:
-            primary_room = self._get_primary_room(class_name)
-            self.schedules[class_name]['metadata']['primary_room'] = (
-                primary_room
-            )
+        from schedule_db import connect, write_schedules
 
-        # Review FREE slots to ensure accuracy
-        self._review_free_slots()
+        self._prepare_export()
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.schedules, f, ensure_ascii=False, indent=2)
+        conn = connect(db_file)
+        try:
+            stats = write_schedules(conn, self.schedules)
+        finally:
+            conn.close()
 
-        print(f"\n✓ Schedules exported to: {output_file}")
-        print(f"✓ Total classes exported: {len(self.schedules)}")
+        print(f"\n✓ Schedules exported to SQLite: {db_file}")
+        print(f"✓ Classes updated: {stats.changed}/{len(self.schedules)}")
+        if stats.pruned_rooms:
+            print(f"✓ Rooms no longer used removed: {stats.pruned_rooms}")
+        if stats.skipped_slots:
+            print(f"  ⚠ {stats.skipped_slots} slots skipped: time range "
+                  f"could not be parsed")
 
+    def record_history(self, db_file, week=None):
+        """Append the schedules to the deduplicated weekly history store.
 
-def main():
-    """Main entry point for the script."""
-    # Check for --ramadan flag
-    ramadan_mode = '--ramadan' in sys.argv
-    args = [a for a in sys.argv[1:] if a != '--ramadan']
+        Args:
+            db_file: Path to the history database (created if missing)
+            week: Week label, by default the ISO week of the class dates
+        """
+        from history import connect, record_snapshot
+
+        self._prepare_export()
+
+        conn = connect(db_file)
+        try:
+            source = Path(self.source_pdf).name if self.source_pdf else None
+            stats = record_snapshot(conn, self.schedules, week, source)
+        finally:
+            conn.close()
+
+        print(f"\n✓ Week {stats.week} recorded in history: {db_file}")
+        print(f"✓ New stored objects: {stats.new_objects} "
+              f"({stats.classes} classes)")
+
+
+def merge_schedule_sets(parsers, on_duplicate='error'):
+    """Combine several parsed schedule sets into a single one.
+
+    Each parser only knows the classes of its own PDF, so reviewing FREE
+    slots per parser misses rooms used by classes from the other PDFs.
+    The merged parser holds the union of all classes and their room usage,
+    so a single `export_to_json` runs one global occupancy review.
+
+    Args:
+        parsers: ScheduleToJSON instances that already parsed their PDF
+        on_duplicate: Policy for a class name found in more than one set:
+            'error' aborts, 'first' keeps the earliest set, 'last' keeps
+            the latest set, 'suffix' keeps both by renaming later copies
+            to '<class>~<set number>'
+
+    Returns:
+        ScheduleToJSON: Parser holding the merged schedules
+
+    Raises:
+        ValueError: On an unknown policy, mixed time modes, or duplicate
+            class names under the 'error' policy
+    """
+    if on_duplicate not in DUPLICATE_POLICIES:
+        raise ValueError(
+            f"Unknown duplicate policy '{on_duplicate}' "
+            f"(expected one of: {', '.join(DUPLICATE_POLICIES)})")
+    if not parsers:
+        raise ValueError("No schedule sets to merge")
+    if len({parser.ramadan_mode for parser in parsers}) > 1:
+        raise ValueError("Cannot merge normal and Ramadan schedule sets")
+
+    print(f"\nMerging {len(parsers)} schedule sets...")
+    merged = ScheduleToJSON(ramadan_mode=parsers[0].ramadan_mode,
+                            rules_file=parsers[0].rules_file)
+    origins = {}
+    duplicates = []
+
+    for set_number, parser in enumerate(parsers, 1):
+        for class_name, schedule in parser.schedules.items():
+            target_name = class_name
+            if class_name in merged.schedules:
+                duplicates.append((class_name, origins[class_name],
+                                   set_number))
+                if on_duplicate in ('error', 'first'):
+                    continue
+                if on_duplicate == 'suffix':
+                    target_name = f"{class_name}~{set_number}"
+
+            # The merged set is reviewed on export; leave the inputs as parsed
+            merged.schedules[target_name] = copy.deepcopy(schedule)
+            merged.class_rooms[target_name] = dict(
+                parser.class_rooms.get(class_name, {}))
+            origins[target_name] = set_number
+
+    if duplicates:
+        if on_duplicate == 'error':
+            details = ', '.join(
+                f"'{cls}' (sets {first} and {second})"
+                for cls, first, second in duplicates[:DUPLICATE_PREVIEW])
+            if len(duplicates) > DUPLICATE_PREVIEW:
+                details += f" (+{len(duplicates) - DUPLICATE_PREVIEW} more)"
+            raise ValueError(f"{len(duplicates)} duplicate class names "
+                             f"across sets: {details}")
+        print(f"  🔄 {len(duplicates)} duplicate class names "
+              f"resolved with policy '{on_duplicate}':")
+        for cls, first, second in duplicates:
+            print(f"     - '{cls}' in sets {first} and {second}")
+
+    merged.source_pdf = ', '.join(
+        Path(parser.source_pdf).name for parser in parsers
+        if parser.source_pdf)
+    print(f"✓ Merged {len(merged.schedules)} classes")
+    return merged
+
+
+def _parse_slot_time(time_str):
+    """Strictly parse a slot time string into (start, end) minutes.
+
+    Args:
+        time_str: Time range string like '09H:00-12H:15'
+
+    Returns:
+        tuple: (start, end) in minutes, or None if malformed or empty
+    """
+    match = SLOT_TIME_PATTERN.match(time_str or '')
+    if not match:
+        return None
+    start_h, start_m, end_h, end_m = (int(g) for g in match.groups())
+    if max(start_h, end_h) > 23 or max(start_m, end_m) > 59:
+        return None
+    start, end = start_h * 60 + start_m, end_h * 60 + end_m
+    return (start, end) if start < end else None
 
-    # Get PDF file path
-    if len(args) > 0:
-        pdf_file = args[0]
-    else:
-        pdf_file = input("Enter PDF file path: ")
 
-    # Get output JSON file path
-    if len(args) > 1:
-        json_file = args[1]
+def _minutes_to_time(minutes):
+    """Format minutes since midnight like the slot times, e.g. '09H:00'."""
+    return f"{minutes // 60:02d}H:{minutes % 60:02d}"
+
+
+def week_dates(period):
+    """Map the day names of a schedule week to their dates.
+
+    Args:
+        period: Period metadata like '10/05/2026 - 16/05/2026 - 09/05/2026'
+            (week start, week end, publication date)
+
+    Returns:
+        dict: Day name (e.g. 'Lundi') to date, empty if the period does
+            not start with a valid date range
+    """
+    bounds = re.findall(r'\d{2}/\d{2}/\d{4}', period or '')[:2]
+    if len(bounds) < 2:
+        return {}
+    try:
+        first, last = (datetime.strptime(value, '%d/%m/%Y').date()
+                       for value in bounds)
+    except ValueError:
+        return {}
+
+    dates = {}
+    day = first
+    while day <= last and len(dates) < 7:
+        dates[WEEKDAY_NAMES[day.weekday()]] = day
+        day += timedelta(days=1)
+    return dates
+
+
+def schedule_dates(schedule):
+    """Dates of the day keys of one class schedule.
+
+    The weekly template in 'days' is stored once; its day keys are dated
+    from the class period rather than duplicating slots per date.
+
+    Args:
+        schedule: One class entry with 'days' and 'metadata'
+
+    Returns:
+        dict: Day key to date, for day keys falling inside the period
+    """
+    dates = week_dates(schedule.get('metadata', {}).get('period'))
+    return {
+        day_key: dates[day_key.split(' ')[0]]
+        for day_key in schedule.get('days', {})
+        if day_key.split(' ')[0] in dates
+    }
+
+
+def iter_dated_slots(schedules):
+    """Expand weekly templates into dated slot occurrences.
+
+    Args:
+        schedules: Mapping of class name to schedule, as in schedules.json
+
+    Yields:
+        tuple: (class_name, date, slot) for every slot of a dated day
+    """
+    for class_name, schedule in schedules.items():
+        for day_key, day in schedule_dates(schedule).items():
+            for slot in schedule['days'][day_key]:
+                yield class_name, day, slot
+
+
+def conflict_report_path(output_file):
+    """Path of the room conflict report written next to an export.
+
+    Args:
+        output_file: Path of the exported schedules JSON file
+
+    Returns:
+        Path: e.g. schedules.conflicts.json for schedules.json
+    """
+    return Path(output_file).with_suffix('.conflicts.json')
+
+
+def find_room_conflicts(schedules):
+    """Find every pair of classes booked in a room at overlapping times.
+
+    All (room, day, start, end, class) intervals of real courses are sorted
+    once and swept in start order, keeping a heap of the bookings still
+    running. The cost is O(n log n) plus the number of pairs reported
+    instead of a pairwise comparison. Online sessions are ignored, and so
+    are overlaps within one class. Two classes with the same course at the
+    same time are reported as a 'joint-session' rather than a 'conflict'.
+
+    Args:
+        schedules: Mapping of class name to schedule, as in schedules.json
+
+    Returns:
+        list: Dicts with room, day, overlap, kind and the two bookings,
+        ordered by room, day and start time
+    """
+    intervals = []
+    for class_name, class_data in schedules.items():
+        for day_key, slots in class_data.get('days', {}).items():
+            for slot in slots:
+                if slot['course'] in FREE_MARKERS or slot['room'] == 'En Ligne':
+                    continue
+                time_range = _parse_slot_time(slot['time'])
+                if time_range:
+                    intervals.append((slot['room'], day_key) + time_range +
+                                     (class_name, slot['course']))
+    intervals.sort()
+
+    conflicts = []
+    current = None
+    active = []  # heap of (end, booking) still running in the room/day
+    for booking in intervals:
+        room, day_key, start, end, class_name, course = booking
+        if (room, day_key) != current:
+            current = (room, day_key)
+            active = []
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+
+        for _, other in active:
+            if other[4] == class_name:
+                continue
+            same_session = other[2:4] == booking[2:4] and other[5] == course
+            conflicts.append({
+                'room': room,
+                'day': day_key,
+                'overlap': (f"{_minutes_to_time(start)}-"
+                            f"{_minutes_to_time(min(end, other[3]))}"),
+                'kind': 'joint-session' if same_session else 'conflict',
+                'bookings': [
+                    {
+                        'class': entry[4],
+                        'course': entry[5],
+                        'time': (f"{_minutes_to_time(entry[2])}-"
+                                 f"{_minutes_to_time(entry[3])}"),
+                    }
+                    for entry in (other, booking)
+                ],
+            })
+        heapq.heappush(active, (end, booking))
+
+    return conflicts
+
+
+def validate_schedules(schedules, ramadan_mode=False, rules_file=None):
+    """Check exported schedules for inconsistencies in a single pass.
+
+    Checks malformed time strings, missing days, overlapping slots within
+    a class, rooms double-booked by different classes (see
+    find_room_conflicts; joint sessions are not reported) and whether
+    every FREE, NOT-FREE and FREEWARNING marker matches what the FREE-slot
+    review would produce.
+
+    Args:
+        schedules: Mapping of class name to schedule, as in schedules.json
+        ramadan_mode: If True, apply the Ramadan FREEWARNING time window
+        rules_file: FREEWARNING rule file (default: the bundled one)
+
+    Returns:
+        list: (check, message) tuples, empty when the data is consistent
+    """
+    rules = ScheduleToJSON(ramadan_mode=ramadan_mode, rules_file=rules_file)
+    warning_rules = rules.warning_rules()
+    issues = []
+    occupied = []     # (room, day, start, end) of real courses
+    markers = []      # (class, day, slot, start, end) of FREE-type slots
+
+    for class_name, class_data in schedules.items():
+        days = class_data.get('days', {})
+        present = {day_key.split(' ')[0] for day_key in days}
+        missing = [day for day in rules.DAY_NAMES if day not in present]
+        if missing:
+            issues.append(('missing-days',
+                           f"{class_name}: {', '.join(missing)}"))
+
+        for day_key, slots in days.items():
+            spans = []
+            for slot in slots:
+                time_range = _parse_slot_time(slot.get('time'))
+                if not time_range:
+                    issues.append((
+                        'malformed-time',
+                        f"{class_name} {day_key}: {slot.get('time')!r}"))
+                    continue
+                spans.append(time_range + (slot['course'],))
+                if slot['course'] in FREE_MARKERS:
+                    markers.append((class_name, day_key, slot) + time_range)
+                else:
+                    occupied.append((slot['room'], day_key) + time_range)
+
+            # Sorted by start, a slot overlaps an earlier one iff it starts
+            # before the furthest end seen so far
+            spans.sort()
+            reach = None
+            for span in spans:
+                if reach and span[0] < reach[1]:
+                    issues.append((
+                        'class-overlap',
+                        f"{class_name} {day_key}: '{reach[2]}' and "
+                        f"'{span[2]}' overlap"))
+                if not reach or span[1] > reach[1]:
+                    reach = span
+
+    for conflict in find_room_conflicts(schedules):
+        if conflict['kind'] == 'conflict':
+            first, second = conflict['bookings']
+            issues.append((
+                'room-double-booked',
+                f"{conflict['room']} {conflict['day']}: "
+                f"{first['class']} '{first['course']}' and "
+                f"{second['class']} '{second['course']}'"))
+
+    room_occupancy = RoomOccupancyIndex(occupied)
+    class_dates = {}
+    for class_name, day_key, slot, start, end in markers:
+        if class_name not in class_dates:
+            class_dates[class_name] = week_dates(
+                schedules[class_name].get('metadata', {}).get('period'))
+        day_name = day_key.split(' ')[0]
+        if room_occupancy.is_occupied(slot['room'], day_key, start, end):
+            expected = 'NOT-FREE'
+        elif warning_rules.matches(slot['room'], day_name, start, end,
+                                   class_dates[class_name].get(day_name)):
+            expected = 'FREEWARNING'
+        else:
+            expected = 'FREE'
+        if slot['course'] != expected:
+            issues.append((
+                'free-slot-status',
+                f"{class_name} {day_key} {slot['time']} {slot['room']}: "
+                f"{slot['course']}, expected {expected}"))
+
+    return issues
+
+
+def validate_file(json_file, ramadan_mode=False, rules_file=None):
+    """Validate an existing schedules.json and print a report.
+
+    Args:
+        json_file: Path to the schedules JSON file
+        ramadan_mode: If True, apply the Ramadan FREEWARNING time window
+        rules_file: FREEWARNING rule file (default: the bundled one)
+
+    Returns:
+        bool: True if no issue was found
+    """
+    import time
+
+    started = time.perf_counter()
+    with open(json_file, encoding='utf-8') as f:
+        schedules = json.load(f)
+    issues = validate_schedules(schedules, ramadan_mode, rules_file)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    slot_count = sum(len(slots) for data in schedules.values()
+                     for slots in data.get('days', {}).values())
+    print(f"Validated {json_file}: {len(schedules)} classes, "
+          f"{slot_count} slots in {elapsed_ms:.0f} ms")
+
+    if not issues:
+        print("✓ No issues found")
+        return True
+
+    by_check = {}
+    for check, message in issues:
+        by_check.setdefault(check, []).append(message)
+    print(f"✗ {len(issues)} issues found:")
+    for check, messages in by_check.items():
+        print(f"  {check}: {len(messages)}")
+        for message in messages[:10]:
+            print(f"     - {message}")
+        if len(messages) > 10:
+            print(f"     ... and {len(messages) - 10} more")
+    return False
+
+
+# Subcommands; arguments that do not start with one of them are an export
+COMMANDS = ('export', 'validate')
+
+
+def build_arg_parser():
+    """Build the command line parser.
+
+    Returns:
+        argparse.ArgumentParser: Parser for the exporter CLI
+    """
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        epilog="Without a subcommand, arguments are those of 'export'.",
+    )
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+    export = subparsers.add_parser(
+        'export',
+        help="Parse schedule PDF(s) and export them (default)",
+        epilog="With several paths, every path but the last is a PDF and "
+               "the last is the output JSON file; schedules split across "
+               "PDFs are merged before the FREE-slot review.",
+    )
+    export.add_argument(
+        'paths',
+        nargs='*',
+        metavar='PATH',
+        help="PDF file(s) to parse, then the output JSON file "
+             "(default: schedules.json). Prompts for both when omitted.",
+    )
+    export.add_argument(
+        '--ramadan',
+        action='store_true',
+        help="Use the Ramadan time slots",
+    )
+    export.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help="Processes extracting PDF pages (default: 1, in-process)",
+    )
+    export.add_argument(
+        '--backend',
+        choices=sorted(BACKENDS),
+        default='pdfplumber',
+        help="PDF text extraction backend (default: pdfplumber); pypdf2 "
+             "reads text positions without layout analysis, for PDFs with "
+             "simple fonts like the ESPRIT timetables; tiered reads pages "
+             "with pypdf2 and re-reads with pdfplumber those that fail "
+             "their checks; fixture replays a recorded word fixture "
+             "given in place of the PDF (see word_fixtures.py)",
+    )
+    export.add_argument(
+        '--queue-depth',
+        type=int,
+        default=DEFAULT_QUEUE_DEPTH,
+        metavar='N',
+        help="Pages extracted ahead, and reviewed classes waiting for the "
+             f"writer (default: {DEFAULT_QUEUE_DEPTH})",
+    )
+    export.add_argument(
+        '--trace',
+        metavar='FILE',
+        help="Print how busy each pipeline stage was and save the timeline "
+             "to FILE (Chrome trace event format)",
+    )
+    export.add_argument(
+        '--ramadan-output',
+        metavar='FILE',
+        help="Also write the Ramadan variant to FILE, from the same parse",
+    )
+    export.add_argument(
+        '--normal-output',
+        metavar='FILE',
+        help="With --ramadan, also write the normal variant to FILE",
+    )
+    export.add_argument(
+        '--rules',
+        metavar='FILE',
+        help="FREEWARNING rule file (default: freewarning_rules.json "
+             "next to this script)",
+    )
+    export.add_argument(
+        '--on-duplicate',
+        choices=DUPLICATE_POLICIES,
+        default='error',
+        help="How to resolve a class found in several PDFs (default: error)",
+    )
+    export.add_argument(
+        '--resume',
+        action='store_true',
+        help="Continue an export that was interrupted: pages checkpointed "
+             "by the earlier run of the same PDF (<output>.<hash>.journal) "
+             "are not extracted again",
+    )
+    export.add_argument(
+        '--publish',
+        action='store_true',
+        help="Also write the room registry (rooms.json), the per-class "
+             "and per-room shards and manifest.json next to the output "
+             "(default: only when exporting to data/schedules.json)",
+    )
+    export.add_argument(
+        '--sqlite',
+        metavar='DB',
+        help="Also export the schedules into this SQLite database",
+    )
+    export.add_argument(
+        '--history',
+        metavar='DB',
+        help="Also append the schedules to this weekly history store "
+             "(see history.py)",
+    )
+    export.add_argument(
+        '--week',
+        help="With --history, the week label (default: ISO week of the "
+             "exported dates, e.g. 2026-W20)",
+    )
+
+    validate = subparsers.add_parser(
+        'validate',
+        help="Check an existing schedules.json without parsing any PDF",
+    )
+    validate.add_argument(
+        'json_file',
+        nargs='?',
+        default='schedules.json',
+        help="Schedules JSON file to check (default: schedules.json)",
+    )
+    validate.add_argument(
+        '--ramadan',
+        action='store_true',
+        help="The file was exported with the Ramadan time slots",
+    )
+    validate.add_argument(
+        '--rules',
+        metavar='FILE',
+        help="FREEWARNING rule file the export used",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Main entry point for the script.
+
+    Args:
+        argv: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        int: Process exit code
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ('-h', '--help'):
+        argv = ['export', *argv]
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+
+    if args.command == 'validate':
+        try:
+            return 0 if validate_file(
+                args.json_file, args.ramadan, args.rules) else 1
+        except FileNotFoundError as e:
+            print(f"Error: File '{e.filename}' not found!")
+        except ValueError as e:
+            print(f"Error: {e}")
+        return 1
+
+    if args.ramadan and args.ramadan_output:
+        arg_parser.error("--ramadan-output needs normal mode; "
+                         "use --normal-output with --ramadan")
+    if args.normal_output and not args.ramadan:
+        arg_parser.error("--normal-output needs --ramadan")
+    if args.week and not args.history:
+        arg_parser.error("--week needs --history")
+    if args.workers < 1 or args.queue_depth < 1:
+        arg_parser.error("--workers and --queue-depth must be at least 1")
+
+    # Get PDF file path(s) and output JSON file path
+    if len(args.paths) > 1:
+        pdf_files = args.paths[:-1]
+        json_file = args.paths[-1]
+    elif args.paths:
+        pdf_files = args.paths
+        json_file = "schedules.json"
     else:
+        pdf_files = [input("Enter PDF file path: ")]
         json_file = input(
             "Enter output JSON file name (default: schedules.json): "
         ).strip()
@@ -1382,25 +2661,86 @@ def main():
             json_file = "schedules.json"
 
     # Parse and export
-    if ramadan_mode:
+    if args.ramadan:
         print("🌙 Ramadan mode enabled - using adjusted time slots")
         print("   Morning: 08:30-11:10 | Afternoon: 11:50-14:30")
-    parser = ScheduleToJSON(ramadan_mode=ramadan_mode)
 
+    trace = None
+    if args.trace:
+        from export_pipeline import StageTrace
+        trace = StageTrace()
+
+    from export_pipeline import PageJournal
+
+    journals = []
+    parsing = True
     try:
         # Use spatial parsing for accurate day mapping
-        parser.parse_pdf_spatial(pdf_file)
-        parser.export_to_json(json_file)
-
+        parsers = []
+        for pdf_file in pdf_files:
+            parser = ScheduleToJSON(ramadan_mode=args.ramadan,
+                                    rules_file=args.rules)
+            # Extracted pages are checkpointed until the export completes
+            journal = PageJournal.for_export(
+                json_file, pdf_file, args.resume, backend=args.backend)
+            journals.append(journal)
+            parser.parse_pdf_spatial(pdf_file, args.workers,
+                                     args.queue_depth, trace, args.backend,
+                                     journal)
+            parsers.append(parser)
+        parsing = False
+
+        if len(parsers) > 1:
+            try:
+                parser = merge_schedule_sets(parsers, args.on_duplicate)
+            except ValueError as e:
+                arg_parser.error(f"{e}; choose another --on-duplicate policy")
+
+        # Variants are copied before the main export reviews FREE slots
+        other_output = (args.normal_output if args.ramadan
+                        else args.ramadan_output)
+        if other_output:
+            variant = parser.for_time_profile(not args.ramadan)
+
+        publish = (args.publish
+                   or Path(json_file).resolve() == PUBLISHED_OUTPUT)
+        parser.export_to_json(json_file, args.queue_depth, trace, publish)
+        if other_output:
+            print(f"\n{'Normal' if args.ramadan else '🌙 Ramadan'} "
+                  f"variant from the same parse:")
+            variant.export_to_json(other_output, args.queue_depth, trace)
+        if args.sqlite:
+            parser.export_to_sqlite(args.sqlite)
+        if args.history:
+            parser.record_history(args.history, args.week)
+
+        if trace:
+            trace.write(args.trace)
+            print(f"\n⏱  Pipeline stages ({args.workers} extraction "
+                  f"workers), timeline written to: {args.trace}")
+            for line in trace.summary():
+                print(f"   {line}")
+
+        for journal in journals:
+            journal.discard()
         print("\n✓ Process completed successfully!")
+        return 0
 
-    except FileNotFoundError:
-        print(f"Error: File '{pdf_file}' not found!")
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found!")
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        for journal in journals:
+            journal.close()
+    # Resuming only helps an export interrupted while extracting pages
+    if parsing and any(journal.recorded for journal in journals):
+        print("Extracted pages are checkpointed; rerun with --resume to "
+              "continue from them")
+    return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
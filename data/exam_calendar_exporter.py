@@ -6,11 +6,13 @@ import argparse
 import json
 import re
 import sys
-from collections import OrderedDict
+from bisect import bisect_right
+from collections import Counter, OrderedDict
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable, Iterator
 
-import pdfplumber
+from manifest import update_manifest
 
 
 WEEKDAYS = {
@@ -27,7 +29,17 @@ EXPECTED_PAGE_COUNT = 42
 EXPECTED_CLASS_COUNT = 243
 EXPECTED_EVENT_COUNT = 1359
 ACADEMIC_YEAR = "2025-2026"
+BUSIEST_DAY_COUNT = 5
+HEADER_LABEL = "Jour"
+# Table rules closer than this (points) are one boundary; the PDF draws
+# most rules twice, 1.2pt apart
+RULE_SNAP_TOLERANCE = 3
+TABLE_MODES = ("grid", "detect")
 SOURCE_PDF = "Calendrier_Session_Principale_2526_VF.pdf"
+# The calendar the web app serves; only it is recorded in the manifest
+PUBLISHED_OUTPUT = (
+    Path(__file__).resolve().parent / f"exam_calendar{ACADEMIC_YEAR}.json"
+)
 
 
 def normalize_space(value: str | None) -> str:
@@ -100,62 +112,212 @@ def repair_row_subjects(cells: list[str]) -> list[str]:
     return repaired
 
 
-def extract_exam_calendar(pdf_path: Path) -> dict:
+def cluster_positions(values: list[float]) -> list[float]:
+    """Merge rule positions closer than RULE_SNAP_TOLERANCE into one."""
+    clusters: list[list[float]] = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][-1] <= RULE_SNAP_TOLERANCE:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return [sum(cluster) / len(cluster) for cluster in clusters]
+
+
+def table_grid(page) -> tuple[list[float], list[float]] | None:
+    """Column and row boundaries of the exam table, read from its ruling.
+
+    Columns are the vertical rules crossing the header row (the one
+    starting with "Jour"), rows the horizontal rules crossing the first
+    column. Returns None when the page has no such header or ruling.
+    """
+    chars = page.chars
+    header = next(
+        (
+            char
+            for index, char in enumerate(chars)
+            if "".join(c["text"] for c in chars[index : index + len(HEADER_LABEL)])
+            == HEADER_LABEL
+        ),
+        None,
+    )
+    if header is None:
+        return None
+
+    middle = (header["top"] + header["bottom"]) / 2
+    columns = cluster_positions(
+        [
+            edge["x0"]
+            for edge in page.vertical_edges
+            if edge["height"] >= RULE_SNAP_TOLERANCE
+            and edge["top"] <= middle <= edge["bottom"]
+        ]
+    )
+    if len(columns) < 5:
+        return None
+    rows = cluster_positions(
+        [
+            edge["top"]
+            for edge in page.horizontal_edges
+            if edge["width"] >= RULE_SNAP_TOLERANCE
+            and edge["x0"] <= columns[0] + RULE_SNAP_TOLERANCE
+            and edge["x1"] >= columns[1] - RULE_SNAP_TOLERANCE
+        ]
+    )
+    if len(rows) < 2:
+        return None
+    return columns, rows
+
+
+def extract_grid_table(page, columns: list[float], rows: list[float]) -> list[list[str]]:
+    """Cell texts of the table with the given boundaries.
+
+    Each character goes to the cell holding its midpoint, as in
+    pdfplumber's own table extraction, but the cells are found by
+    bisecting the boundaries instead of filtering every character per
+    row and per cell.
+    """
+    from pdfplumber.utils import extract_text
+
+    cells: list[list[list[dict]]] = [[[] for _ in columns[1:]] for _ in rows[1:]]
+    for char in page.chars:
+        column = bisect_right(columns, (char["x0"] + char["x1"]) / 2) - 1
+        row = bisect_right(rows, (char["top"] + char["bottom"]) / 2) - 1
+        if 0 <= column < len(columns) - 1 and 0 <= row < len(rows) - 1:
+            cells[row][column].append(char)
+    return [
+        [extract_text(chars) if chars else "" for chars in row_cells]
+        for row_cells in cells
+    ]
+
+
+def extract_page_table(page, mode: str) -> list[list[str | None]]:
+    """The exam table of a page.
+
+    In "grid" mode the table is cut along the rules of its header row and
+    falls back to pdfplumber's table detection on pages whose ruling
+    cannot be read; "detect" always uses the detection.
+    """
+    grid = table_grid(page) if mode == "grid" else None
+    if grid:
+        return extract_grid_table(page, *grid)
+
+    tables = page.extract_tables()
+    return max(tables, key=len) if tables else []
+
+
+def exam_load(slot_sittings: Counter, day_names: dict[str, str]) -> dict:
+    """Summarize exam sittings per (date, time) slot for the metadata.
+
+    A sitting is one class taking an exam, so a slot's sittings are the
+    classes examined concurrently in it.
+    """
+    slots = [
+        {"date": date, "day": day_names[date], "time": time, "sittings": count}
+        for (date, time), count in sorted(slot_sittings.items())
+    ]
+
+    days: dict[str, dict] = {}
+    for slot in slots:
+        day = days.setdefault(
+            slot["date"],
+            {"date": slot["date"], "day": slot["day"], "sittings": 0, "slots": 0},
+        )
+        day["sittings"] += slot["sittings"]
+        day["slots"] += 1
+    busiest_days = sorted(
+        days.values(), key=lambda day: (-day["sittings"], day["date"])
+    )[:BUSIEST_DAY_COUNT]
+
+    return {
+        "slotCount": len(slots),
+        "peakSlot": max(slots, key=lambda slot: slot["sittings"], default=None),
+        "busiestDays": busiest_days,
+        "slots": slots,
+    }
+
+
+def iter_page_tables(
+    pdf_path: Path, table_mode: str = "grid"
+) -> Iterator[tuple[int, list[list[str | None]]]]:
+    """(page number, table rows) of every page of an exam calendar PDF."""
+    # Imported here so --help and argument errors do not pay for pdfplumber
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=1):
+            yield page_number, extract_page_table(page, table_mode)
+
+
+def extract_exam_calendar(pdf_path: Path, table_mode: str = "grid") -> dict:
+    return build_exam_calendar(
+        iter_page_tables(pdf_path, table_mode), pdf_path.name
+    )
+
+
+def build_exam_calendar(
+    page_tables: Iterable[tuple[int, list[list[str | None]]]], source_pdf: str
+) -> dict:
+    """Build the calendar from each page's table rows.
+
+    The rows may come straight from the PDF or from a recorded fixture
+    (see word_fixtures.py), which skips PDF parsing entirely.
+    """
     classes: OrderedDict[str, list[dict[str, str]]] = OrderedDict()
     duplicate_classes: set[str] = set()
     pages_parsed = 0
     malformed: list[tuple[int, str, str]] = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        total_pages = len(pdf.pages)
-
-        for page_number, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables()
-            if not tables:
-                raise ValueError(f"Page {page_number} has no extractable table")
-
-            table = max(tables, key=len)
-            header = next(
-                (row for row in table if row and normalize_space(row[0]) == "Jour"),
-                None,
-            )
-            if not header:
-                raise ValueError(f"Page {page_number} has no table header")
-
-            page_classes = [normalize_space(cell) for cell in header[3:] if normalize_space(cell)]
-            if not page_classes:
-                raise ValueError(f"Page {page_number} has no class columns")
-
-            for class_code in page_classes:
-                if class_code in classes:
-                    duplicate_classes.add(class_code)
-                classes.setdefault(class_code, [])
-
-            for row in table:
-                if not is_exam_row(row):
+    slot_sittings: Counter = Counter()
+    day_names: dict[str, str] = {}
+    total_pages = 0
+
+    for page_number, table in page_tables:
+        total_pages += 1
+        if not table:
+            raise ValueError(f"Page {page_number} has no extractable table")
+
+        header = next(
+            (row for row in table if row and normalize_space(row[0]) == "Jour"),
+            None,
+        )
+        if not header:
+            raise ValueError(f"Page {page_number} has no table header")
+
+        page_classes = [normalize_space(cell) for cell in header[3:] if normalize_space(cell)]
+        if not page_classes:
+            raise ValueError(f"Page {page_number} has no class columns")
+
+        for class_code in page_classes:
+            if class_code in classes:
+                duplicate_classes.add(class_code)
+            classes.setdefault(class_code, [])
+
+        for row in table:
+            if not is_exam_row(row):
+                continue
+
+            day = normalize_space(row[0])
+            date = parse_date(row[1])
+            time = clean_time(row[2])
+            raw_cells = row[3 : 3 + len(page_classes)]
+            subjects = repair_row_subjects([clean_subject(cell) for cell in raw_cells])
+
+            for class_code, subject in zip(page_classes, subjects):
+                if not subject:
                     continue
-
-                day = normalize_space(row[0])
-                date = parse_date(row[1])
-                time = clean_time(row[2])
-                raw_cells = row[3 : 3 + len(page_classes)]
-                subjects = repair_row_subjects([clean_subject(cell) for cell in raw_cells])
-
-                for class_code, subject in zip(page_classes, subjects):
-                    if not subject:
-                        continue
-                    if not is_valid_subject(subject):
-                        malformed.append((page_number, class_code, subject))
-                    classes[class_code].append(
-                        {
-                            "date": date,
-                            "day": day,
-                            "time": time,
-                            "subject": subject,
-                        }
-                    )
-
-            pages_parsed += 1
+                if not is_valid_subject(subject):
+                    malformed.append((page_number, class_code, subject))
+                slot_sittings[date, time] += 1
+                day_names[date] = day
+                classes[class_code].append(
+                    {
+                        "date": date,
+                        "day": day,
+                        "time": time,
+                        "subject": subject,
+                    }
+                )
+
+        pages_parsed += 1
 
     for exams in classes.values():
         exams.sort(key=lambda exam: (exam["date"], exam["time"], exam["subject"]))
@@ -164,10 +326,11 @@ def extract_exam_calendar(pdf_path: Path) -> dict:
     data = {
         "metadata": {
             "academicYear": ACADEMIC_YEAR,
-            "sourcePdf": pdf_path.name,
+            "sourcePdf": source_pdf,
             "pagesParsed": pages_parsed,
             "classCount": len(classes),
             "eventCount": event_count,
+            "load": exam_load(slot_sittings, day_names),
         },
         "classes": classes,
     }
@@ -208,12 +371,30 @@ def main() -> int:
         default=str(Path("data") / "exam_calendar2025-2026.json"),
         help="Path to write JSON output",
     )
+    parser.add_argument(
+        "--sqlite",
+        metavar="DB",
+        help="Also write the exams into this SQLite database",
+    )
+    parser.add_argument(
+        "--tables",
+        choices=TABLE_MODES,
+        default="grid",
+        help="Cut tables along their header row's rules (grid, default) or "
+        "let pdfplumber detect them on every page (detect)",
+    )
+    parser.add_argument(
+        "--publish",
+        action="store_true",
+        help="Record the output in manifest.json next to it (default: only "
+        "when writing data/exam_calendar2025-2026.json)",
+    )
     args = parser.parse_args()
 
     pdf_path = Path(args.pdf)
     output_path = Path(args.output)
 
-    data = extract_exam_calendar(pdf_path)
+    data = extract_exam_calendar(pdf_path, args.tables)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(
         json.dumps(data, ensure_ascii=False, indent=2) + "\n",
@@ -227,7 +408,29 @@ def main() -> int:
         f"{metadata['classCount']} classes from "
         f"{metadata['pagesParsed']} pages."
     )
+    peak = metadata["load"]["peakSlot"]
+    if peak:
+        print(
+            f"Peak slot: {peak['sittings']} classes on {peak['day']} "
+            f"{peak['date']} at {peak['time']}"
+        )
     print(f"Wrote {output_path}")
+
+    if args.publish or output_path.resolve() == PUBLISHED_OUTPUT:
+        manifest_path = update_manifest(
+            output_path.parent, {output_path: {"classes": data["classes"]}}
+        )
+        print(f"Updated {manifest_path}")
+
+    if args.sqlite:
+        from schedule_db import connect, write_exams
+
+        conn = connect(args.sqlite)
+        try:
+            changed = write_exams(conn, data["classes"])
+        finally:
+            conn.close()
+        print(f"Wrote {args.sqlite} ({changed} classes updated)")
     return 0
 
 
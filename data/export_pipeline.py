@@ -0,0 +1,395 @@
+"""Export pipeline stages: parallel page extraction and a streaming writer.
+
+Page extraction (PDF text layout, see pdf_backends) dominates the export
+and is pure Python, so it runs in worker processes. Pages come back in page order
+to be assembled one by one, since FREE-slot filling depends on the rooms
+tallied on earlier pages. The FREE-slot review is the single barrier: it
+needs every class, after which each reviewed class goes straight to a
+writer thread. Bounded queues between the stages keep memory flat.
+Extracted pages can be checkpointed to a PageJournal, so an export that
+was killed resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+class StageTrace:
+    """Timeline of pipeline stage activity.
+
+    Each span records a stage, the lane (thread or worker process) it ran
+    on and its start and end. The timeline can be printed as a busy summary
+    or saved in the Chrome trace event format (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.events: list[tuple[str, str, str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def add(
+        self, stage: str, label: str, start: float, end: float, lane: str
+    ) -> None:
+        with self._lock:
+            self.events.append((stage, label, lane, start, end))
+
+    @contextmanager
+    def span(self, stage: str, label: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(stage, label, start, time.monotonic(),
+                     threading.current_thread().name)
+
+    def summary(self) -> list[str]:
+        """One line per stage: busy time and utilization of its lanes."""
+        if not self.events:
+            return []
+        wall = max(end for *_, end in self.events) - self.started
+        stages: dict[str, tuple[float, set[str]]] = {}
+        for stage, _, lane, start, end in self.events:
+            busy, lanes = stages.get(stage, (0.0, set()))
+            lanes.add(lane)
+            stages[stage] = (busy + end - start, lanes)
+
+        lines = [f"wall clock {wall:.2f} s"]
+        for stage, (busy, lanes) in stages.items():
+            utilization = busy / (wall * len(lanes)) if wall else 0.0
+            lines.append(
+                f"{stage:<9} {len(lanes):>2} lane(s)  busy {busy:6.2f} s  "
+                f"({utilization:.0%} of their time)"
+            )
+        return lines
+
+    def write(self, path: str | Path) -> None:
+        """Save the timeline as Chrome trace events (microseconds)."""
+        lanes: dict[str, int] = {}
+        events = []
+        for stage, label, lane, start, end in self.events:
+            events.append({
+                "name": label,
+                "cat": stage,
+                "ph": "X",
+                "ts": round((start - self.started) * 1e6),
+                "dur": round((end - start) * 1e6),
+                "pid": 0,
+                "tid": lanes.setdefault(lane, len(lanes)),
+            })
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": tid,
+             "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        ]
+        Path(path).write_text(
+            json.dumps({"traceEvents": events}), encoding="utf-8"
+        )
+
+
+# Per worker process: (document, parser, cache counters at start)
+_worker = None
+
+
+def _cache_counts() -> dict[str, tuple[int, int]]:
+    from data_exporter import CACHED_TEXT_HELPERS
+
+    return {
+        name: (helper.cache_info().hits, helper.cache_info().misses)
+        for name, helper in CACHED_TEXT_HELPERS.items()
+    }
+
+
+def _init_worker(pdf_path: str, backend: str) -> None:
+    global _worker
+    from data_exporter import ScheduleToJSON
+    from pdf_backends import open_backend
+
+    _worker = (open_backend(backend, pdf_path), ScheduleToJSON(),
+               _cache_counts())
+
+
+def _extract_in_worker(page_index: int):
+    pdf, parser, cache_start = _worker
+    page_num = page_index + 1
+    log = io.StringIO()
+    start = time.monotonic()
+    # Page messages are replayed by the main process, in page order
+    with redirect_stdout(log):
+        extracted = parser._extract_page(pdf[page_index], page_num)
+    end = time.monotonic()
+    cache = {
+        name: (hits - cache_start[name][0], misses - cache_start[name][1])
+        for name, (hits, misses) in _cache_counts().items()
+    }
+    return page_num, extracted, log.getvalue(), start, end, os.getpid(), cache
+
+
+class PageExtractor:
+    """Extracted pages of a PDF, yielded in page order.
+
+    With one worker pages are extracted in-process by `extract_page`. With
+    more, worker processes extract them and at most `queue_depth` pages are
+    in flight or waiting for the consumer. Pages are read with the named
+    pdf_backends backend. Pages in `done` (page number -> extraction, e.g.
+    from a PageJournal) are yielded as they are, without being read.
+    """
+
+    def __init__(
+        self,
+        pdf_path: str | Path,
+        extract_page: Callable,
+        workers: int = 1,
+        queue_depth: int = 16,
+        trace: StageTrace | None = None,
+        backend: str = "pdfplumber",
+        done: dict[int, object] | None = None,
+    ) -> None:
+        self.pdf_path = str(pdf_path)
+        self.backend = backend
+        self.extract_page = extract_page
+        self.workers = workers
+        self.queue_depth = max(queue_depth, workers)
+        self.trace = trace
+        self.done = done or {}
+        self.worker_cache_info: dict[int, dict[str, tuple[int, int]]] = {}
+        self._pdf = None
+        self._pool = None
+
+    def __enter__(self) -> PageExtractor:
+        from pdf_backends import open_backend
+
+        self._pdf = open_backend(self.backend, self.pdf_path)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self._pdf.close()
+
+    def __len__(self) -> int:
+        return len(self._pdf)
+
+    def __iter__(self) -> Iterator[tuple[int, object]]:
+        if self.workers > 1:
+            yield from self._iter_parallel()
+            return
+        for page_num in range(1, len(self) + 1):
+            if page_num in self.done:
+                yield page_num, self.done[page_num]
+                continue
+            page = self._pdf[page_num - 1]
+            if self.trace:
+                with self.trace.span("extract", f"page {page_num}"):
+                    extracted = self.extract_page(page, page_num)
+            else:
+                extracted = self.extract_page(page, page_num)
+            yield page_num, extracted
+
+    def _iter_parallel(self) -> Iterator[tuple[int, object]]:
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(self.pdf_path, self.backend),
+        )
+        total = len(self)
+        pending: deque = deque()
+        next_index = 0
+        while pending or next_index < total:
+            while next_index < total and len(pending) < self.queue_depth:
+                if next_index + 1 in self.done:
+                    pending.append(next_index + 1)
+                else:
+                    pending.append(
+                        self._pool.submit(_extract_in_worker, next_index))
+                next_index += 1
+            item = pending.popleft()
+            if isinstance(item, int):
+                yield item, self.done[item]
+                continue
+            page_num, extracted, log, start, end, pid, cache = item.result()
+            sys.stdout.write(log)
+            if self.trace:
+                self.trace.add("extract", f"page {page_num}", start, end,
+                               f"worker {pid}")
+            self.worker_cache_info[pid] = cache
+            yield page_num, extracted
+
+
+class PageJournal:
+    """Checkpoint journal of extracted pages, for resuming a killed export.
+
+    A JSON Lines file: a header identifying the run (the PDF's content
+    hash and the settings extraction depends on), then one line per page
+    with its extraction result, flushed as soon as the page is assembled.
+    A resumed run hands the recorded pages to PageExtractor as `done`;
+    they go through assembly again in page order, which rebuilds room
+    counts, FREE-slot filling and duplicate tracking exactly, and only
+    the remaining pages are extracted from the PDF.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str | Path, key: dict, resume: bool = False) -> None:
+        self.path = Path(path)
+        self.key = {"version": self.VERSION, **key}
+        self.resume = resume
+        self.recorded = 0
+        self._file = None
+
+    @classmethod
+    def for_export(
+        cls, output_file: str | Path, pdf_path: str | Path,
+        resume: bool = False, **settings,
+    ) -> PageJournal:
+        """Journal of exporting `pdf_path` to `output_file`, keyed by its hash."""
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        pdf_hash = digest.hexdigest()
+        output_file = Path(output_file)
+        path = output_file.with_name(
+            f"{output_file.name}.{pdf_hash[:12]}.journal")
+        return cls(path, {"pdf": pdf_hash, **settings}, resume)
+
+    def load(self) -> dict[int, object]:
+        """Pages recorded by an earlier run of the same PDF and settings.
+
+        Empty unless resuming. Reading stops at a line cut short by the
+        process being killed.
+        """
+        done: dict[int, object] = {}
+        if not self.resume:
+            return done
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                if json.loads(f.readline()) != self.key:
+                    return done
+                for line in f:
+                    entry = json.loads(line)
+                    extracted = entry["extracted"]
+                    done[entry["page"]] = (extracted if isinstance(extracted, str)
+                                           else tuple(extracted))
+        except (FileNotFoundError, KeyError, ValueError):
+            pass
+        return done
+
+    def open(self, done: dict[int, object]) -> None:
+        """Start the journal afresh, keeping the pages in `done`."""
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write(json.dumps(self.key) + "\n")
+        for page_num, extracted in sorted(done.items()):
+            self._write(page_num, extracted)
+        self._file.flush()
+        self.recorded = len(done)
+
+    def _write(self, page_num: int, extracted: object) -> None:
+        self._file.write(json.dumps(
+            {"page": page_num, "extracted": extracted}, ensure_ascii=False
+        ) + "\n")
+
+    def record(self, page_num: int, extracted: object) -> None:
+        self._write(page_num, extracted)
+        self._file.flush()
+        self.recorded += 1
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Remove the journal once the export it protects is complete."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+_DONE = object()
+
+
+class JSONStreamWriter:
+    """Write classes into a JSON object on a writer thread as they arrive.
+
+    The file is byte-identical to ``json.dump(schedules, f,
+    ensure_ascii=False, indent=2)`` of the same classes in the same order.
+    It is written under a temporary name and only replaces `output_file`
+    once complete.
+    """
+
+    def __init__(
+        self,
+        output_file: str | Path,
+        queue_depth: int = 16,
+        trace: StageTrace | None = None,
+    ) -> None:
+        self.output_file = Path(output_file)
+        self.trace = trace
+        self._queue: queue.Queue = queue.Queue(maxsize=max(queue_depth, 1))
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="writer")
+        self._partial = self.output_file.with_name(
+            self.output_file.name + ".partial"
+        )
+
+    def __enter__(self) -> JSONStreamWriter:
+        self._file = open(self._partial, "w", encoding="utf-8")
+        self._thread.start()
+        return self
+
+    def put(self, class_name: str, schedule: dict) -> None:
+        if self._error:
+            raise self._error
+        self._queue.put((class_name, schedule))
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._queue.put(_DONE)
+        self._thread.join()
+        self._file.close()
+        if exc_type is None and self._error is None:
+            os.replace(self._partial, self.output_file)
+            return
+        self._partial.unlink(missing_ok=True)
+        if exc_type is None:
+            raise self._error
+
+    def _write(self, first: bool, class_name: str, schedule: dict) -> None:
+        body = json.dumps(schedule, ensure_ascii=False, indent=2)
+        self._file.write(
+            ("\n  " if first else ",\n  ")
+            + json.dumps(class_name, ensure_ascii=False)
+            + ": "
+            + body.replace("\n", "\n  ")
+        )
+
+    def _run(self) -> None:
+        first = True
+        done = False
+        try:
+            self._file.write("{")
+            while not (done := (item := self._queue.get()) is _DONE):
+                if self.trace:
+                    with self.trace.span("write", item[0]):
+                        self._write(first, *item)
+                else:
+                    self._write(first, *item)
+                first = False
+            self._file.write("}" if first else "\n}")
+        except BaseException as error:
+            self._error = error
+            # Keep draining so the producer never blocks on a full queue
+            while not done:
+                done = self._queue.get() is _DONE
@@ -0,0 +1,337 @@
+"""Append-only history of weekly schedule exports, deduplicated by content.
+
+Each recorded export is a snapshot: a small manifest mapping every class
+to the hash of its payload. Payloads are stored once in an object table
+keyed by the hash of their canonical JSON, so a class that did not change
+since last week costs one manifest row, not another copy of its schedule.
+
+A class payload is split in two objects: its week-independent part (days,
+year, primary room) and the metadata that moves every week (period and
+dates). The weekly part is shared by all classes of a week, so an
+unchanged timetable deduplicates across weeks.
+
+Usage:
+    python data/history.py record schedules.json [--week 2026-W20]
+    python data/history.py weeks
+    python data/history.py rooms 1A1
+    python data/history.py free Lundi 09:00
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterator, Mapping, NamedTuple
+
+from manifest import canonical_json, content_hash
+from schedule_db import FREE_MARKERS, ONLINE_ROOM, parse_time_range
+
+
+DEFAULT_HISTORY_DB = Path(__file__).resolve().parent / "history.db"
+
+# Metadata that changes every week even when the timetable does not
+WEEKLY_METADATA = ("period", "dates")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    hash TEXT PRIMARY KEY,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    week TEXT NOT NULL,
+    source TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_week ON snapshots (week, id);
+CREATE TABLE IF NOT EXISTS snapshot_classes (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    class TEXT NOT NULL,
+    schedule_hash TEXT NOT NULL REFERENCES objects(hash),
+    weekly_hash TEXT NOT NULL REFERENCES objects(hash),
+    PRIMARY KEY (snapshot_id, class)
+);
+"""
+
+
+class RecordStats(NamedTuple):
+    snapshot_id: int
+    week: str
+    classes: int
+    new_objects: int
+
+
+def connect(db_path: str | Path = DEFAULT_HISTORY_DB) -> sqlite3.Connection:
+    """Open (or create) the history store and ensure the schema exists."""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def split_payload(payload: Mapping) -> tuple[dict, dict]:
+    """(week-independent payload, weekly metadata) of one class."""
+    metadata = dict(payload.get("metadata", {}))
+    weekly = {key: metadata.pop(key) for key in WEEKLY_METADATA
+              if key in metadata}
+    return {**payload, "metadata": metadata}, weekly
+
+
+def week_label(schedules: Mapping[str, Mapping]) -> str:
+    """ISO week ('2026-W20') of an export, the one most of its classes fall in.
+
+    A class is dated by metadata.dates when present, otherwise by the end
+    (second dd/mm/yyyy date) of metadata.period, which starts on Sunday.
+
+    Raises:
+        ValueError: if no class carries a usable date
+    """
+    class_weeks: Counter = Counter()
+    for payload in schedules.values():
+        metadata = payload.get("metadata", {})
+        try:
+            if metadata.get("dates"):
+                day = min(date.fromisoformat(value)
+                          for value in metadata["dates"].values())
+            else:
+                end = metadata.get("period", "").split(" - ")[1]
+                day = datetime.strptime(end.strip(), "%d/%m/%Y").date()
+        except (IndexError, ValueError):
+            continue
+        year, week, _ = day.isocalendar()
+        class_weeks[f"{year}-W{week:02d}"] += 1
+    if not class_weeks:
+        raise ValueError("no dated class in the export; pass a week label")
+    return class_weeks.most_common(1)[0][0]
+
+
+def record_snapshot(
+    conn: sqlite3.Connection,
+    schedules: Mapping[str, Mapping],
+    week: str | None = None,
+    source: str | None = None,
+) -> RecordStats:
+    """Append a snapshot of `schedules`; only unseen payloads are stored.
+
+    Recording a week again adds a newer snapshot for it; queries read the
+    latest snapshot of each week and earlier ones are kept.
+    """
+    week = week or week_label(schedules)
+    objects: dict[str, str] = {}
+    rows = []
+    for class_name, payload in schedules.items():
+        hashes = []
+        for part in split_payload(payload):
+            body = canonical_json(part)
+            digest = content_hash(body)
+            objects[digest] = body.decode("utf-8")
+            hashes.append(digest)
+        rows.append((class_name, *hashes))
+
+    with conn:
+        before = conn.total_changes
+        conn.executemany(
+            "INSERT OR IGNORE INTO objects (hash, body) VALUES (?, ?)",
+            objects.items(),
+        )
+        new_objects = conn.total_changes - before
+        snapshot_id = conn.execute(
+            "INSERT INTO snapshots (week, source, recorded_at) VALUES (?, ?, ?)",
+            (week, source, datetime.now().isoformat(timespec="seconds")),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO snapshot_classes VALUES (?, ?, ?, ?)",
+            ((snapshot_id, *row) for row in rows),
+        )
+    return RecordStats(snapshot_id, week, len(rows), new_objects)
+
+
+def _latest_snapshots(conn: sqlite3.Connection) -> list[tuple[str, int]]:
+    return conn.execute(
+        "SELECT week, MAX(id) FROM snapshots GROUP BY week ORDER BY week"
+    ).fetchall()
+
+
+def weeks(conn: sqlite3.Connection) -> list[str]:
+    """Recorded weeks, oldest first."""
+    return [week for week, _ in _latest_snapshots(conn)]
+
+
+def _manifest(conn: sqlite3.Connection, snapshot_id: int) -> dict[str, str]:
+    return dict(conn.execute(
+        "SELECT class, schedule_hash FROM snapshot_classes "
+        "WHERE snapshot_id = ?",
+        (snapshot_id,),
+    ))
+
+
+def _load(conn: sqlite3.Connection, digest: str) -> dict:
+    (body,) = conn.execute(
+        "SELECT body FROM objects WHERE hash = ?", (digest,)
+    ).fetchone()
+    return json.loads(body)
+
+
+def class_payload(
+    conn: sqlite3.Connection, class_name: str, week: str
+) -> dict | None:
+    """A class as exported in `week` (latest snapshot), or None."""
+    row = conn.execute(
+        "SELECT c.schedule_hash, c.weekly_hash FROM snapshot_classes c "
+        "WHERE c.class = ? AND c.snapshot_id = "
+        "(SELECT MAX(id) FROM snapshots WHERE week = ?)",
+        (class_name, week),
+    ).fetchone()
+    if row is None:
+        return None
+    payload = _load(conn, row[0])
+    payload["metadata"].update(_load(conn, row[1]))
+    return payload
+
+
+def _iter_class_hashes(
+    conn: sqlite3.Connection, class_name: str
+) -> Iterator[tuple[str, str | None]]:
+    for week, snapshot_id in _latest_snapshots(conn):
+        row = conn.execute(
+            "SELECT schedule_hash FROM snapshot_classes "
+            "WHERE snapshot_id = ? AND class = ?",
+            (snapshot_id, class_name),
+        ).fetchone()
+        yield week, row[0] if row else None
+
+
+def _rooms_used(payload: Mapping) -> tuple[str, ...]:
+    return tuple(sorted({
+        slot["room"]
+        for slots in payload["days"].values()
+        for slot in slots
+        if slot["course"] not in FREE_MARKERS
+        and slot["room"] and slot["room"] != ONLINE_ROOM
+    }))
+
+
+def room_history(
+    conn: sqlite3.Connection, class_name: str
+) -> list[tuple[str, tuple[str, ...] | None]]:
+    """Rooms a class had courses in, per week (None: not in that export).
+
+    Payloads are decoded once per distinct hash, so weeks where the class
+    did not change cost a manifest lookup only.
+    """
+    rooms_by_hash: dict[str, tuple[str, ...]] = {}
+    history = []
+    for week, digest in _iter_class_hashes(conn, class_name):
+        if digest is not None and digest not in rooms_by_hash:
+            rooms_by_hash[digest] = _rooms_used(_load(conn, digest))
+        history.append((week, rooms_by_hash.get(digest)))
+    return history
+
+
+def _occupancy(payload: Mapping, day: str, minute: int) -> tuple[set, set]:
+    """(rooms seen, rooms occupied at day/minute) in one class payload."""
+    seen, occupied = set(), set()
+    for day_key, slots in payload["days"].items():
+        for slot in slots:
+            room = slot["room"]
+            if not room or room == ONLINE_ROOM:
+                continue
+            seen.add(room)
+            if not day_key.startswith(day):
+                continue
+            time_range = parse_time_range(slot["time"])
+            if (time_range and time_range[0] <= minute < time_range[1]
+                    and slot["course"] not in ("FREE", "FREEWARNING")):
+                occupied.add(room)
+    return seen, occupied
+
+
+def consistently_free(
+    conn: sqlite3.Connection, day: str, minute: int
+) -> list[str]:
+    """Rooms known in every recorded week and never occupied at day/minute.
+
+    A course or NOT-FREE slot occupies its room, like the web side's
+    free-room search.
+    """
+    by_hash: dict[str, tuple[set, set]] = {}
+    always_seen: set | None = None
+    ever_occupied: set = set()
+    for _, snapshot_id in _latest_snapshots(conn):
+        seen: set = set()
+        for digest in _manifest(conn, snapshot_id).values():
+            if digest not in by_hash:
+                by_hash[digest] = _occupancy(_load(conn, digest), day, minute)
+            class_seen, class_occupied = by_hash[digest]
+            seen |= class_seen
+            ever_occupied |= class_occupied
+        always_seen = seen if always_seen is None else always_seen & seen
+    return sorted((always_seen or set()) - ever_occupied)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--db",
+        default=str(DEFAULT_HISTORY_DB),
+        help="History database (default: history.db next to this script)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Append an export")
+    record.add_argument("json_file", help="Exported schedules JSON file")
+    record.add_argument(
+        "--week", help="Week label (default: ISO week of the export's dates)"
+    )
+    commands.add_parser("weeks", help="List recorded weeks")
+    rooms = commands.add_parser("rooms", help="Rooms of a class, per week")
+    rooms.add_argument("class_name")
+    free = commands.add_parser(
+        "free", help="Rooms free at a day and time in every recorded week"
+    )
+    free.add_argument("day", help="Day name, e.g. Lundi")
+    free.add_argument("time", help="HH:MM")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        if args.command == "record":
+            with open(args.json_file, encoding="utf-8") as f:
+                schedules = json.load(f)
+            stats = record_snapshot(conn, schedules, args.week,
+                                    Path(args.json_file).name)
+            print(f"Recorded {stats.week}: {stats.classes} classes, "
+                  f"{stats.new_objects} new objects")
+        elif args.command == "weeks":
+            for week in weeks(conn):
+                print(week)
+        elif args.command == "rooms":
+            previous = None
+            changes = 0
+            for week, used in room_history(conn, args.class_name):
+                marker = ""
+                if used is not None and previous is not None and used != previous:
+                    changes += 1
+                    marker = "  (changed)"
+                print(f"{week}  {', '.join(used) if used is not None else '-'}"
+                      f"{marker}")
+                previous = used if used is not None else previous
+            print(f"{changes} room change(s)")
+        else:
+            hours, _, minutes = args.time.partition(":")
+            if not (hours.isdigit() and minutes.isdigit()):
+                parser.error("time must be HH:MM")
+            rooms_free = consistently_free(
+                conn, args.day, int(hours) * 60 + int(minutes))
+            print(" ".join(rooms_free) if rooms_free else "No room")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Export manifest: strong content hashes of the exported files.
+
+Both exporters record their published output (the files the web app
+serves, see --publish) in manifest.json, next to the files:
+
+    {"files": {"schedules.json": {"hash": ..., "size": ...,
+                                  "entries": {"classes": {name: hash},
+                                              "rooms": {room: hash}}},
+               "rooms.json": {"hash": ..., "size": ...},
+               ...}}
+
+A file hash covers the exact bytes served. An entry hash covers the
+canonical JSON of one class or room (sorted keys, no whitespace), so it
+only changes when that entry's content does. The web side derives its
+ETags from these hashes without reading or hashing the data itself.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Mapping
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+def content_hash(data: bytes) -> str:
+    """Full SHA-256 hex digest; entries and snapshots are keyed by it."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def canonical_json(value: object) -> bytes:
+    """Canonical serialization: sorted keys, compact separators, UTF-8."""
+    return json.dumps(
+        value, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def entry_hashes(entries: Mapping[str, object]) -> dict[str, str]:
+    """Hash of each entry's canonical JSON, by key in sorted order."""
+    return {key: content_hash(canonical_json(entries[key]))
+            for key in sorted(entries)}
+
+
+def update_manifest(
+    directory: str | Path,
+    files: Mapping[str | Path, Mapping[str, Mapping] | None],
+) -> Path:
+    """Record `files` in the manifest of `directory`.
+
+    `files` maps each written file to its entry sections ({"classes":
+    {name: value}}), or None to record the file hash only. Entries of
+    files written by other exporters are kept.
+    """
+    manifest_path = Path(directory) / MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    recorded = manifest.setdefault("files", {})
+
+    for file, sections in files.items():
+        data = Path(file).read_bytes()
+        entry: dict = {"hash": content_hash(data), "size": len(data)}
+        if sections:
+            entry["entries"] = {
+                section: entry_hashes(values)
+                for section, values in sections.items()
+            }
+        recorded[Path(file).name] = entry
+
+    manifest["files"] = dict(sorted(recorded.items()))
+    manifest_path.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    return manifest_path
@@ -0,0 +1,419 @@
+"""PDF extraction backends for the spatial parser.
+
+A backend opens a PDF and hands out pages with a small uniform interface:
+
+    width             page width in points
+    content_stream()  raw page content stream bytes, for the pre-filter
+    words()           Word records (text, x0, x1, top) in reading order;
+                      also releases the page's parsed objects
+    close()           release the page without extracting it
+
+"pdfplumber" builds words from pdfminer's full layout analysis. "pypdf2"
+reads text positions with PyPDF2's ``visitor_text`` hook and lays the
+characters out with the fonts' glyph widths, skipping the layout objects.
+It handles simple fonts (the standard 14 or fonts with a /Widths array),
+which is what the ESPRIT timetables use, and refuses composite fonts.
+Both feed the same `tokenize_chars`, so words split identically.
+
+"tiered" hands out `TieredPage`s: read with pypdf2 first, with the
+pdfplumber page on standby for the parser to escalate to when the cheap
+result fails its checks.
+
+"fixture" opens a recorded word fixture instead of a PDF and replays
+its pages' words, so the parser runs without any PDF parsing.
+"""
+
+from __future__ import annotations
+
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+
+# Word building: pdfplumber's default x/y tolerances, which split the
+# ESPRIT timetable's tokens where its extract_words() does
+WORD_GAP = 3
+LINE_TOLERANCE = 3
+LIGATURES = {"ﬀ": "ff", "ﬃ": "ffi", "ﬄ": "ffl", "ﬁ": "fi", "ﬂ": "fl",
+             "ﬆ": "st", "ﬅ": "st"}
+
+
+class Word:
+    """Positioned word keeping only the fields the spatial parser reads."""
+
+    __slots__ = ("text", "x0", "x1", "top")
+
+    def __init__(self, text: str, x0: float, x1: float, top: float) -> None:
+        self.text = text
+        self.x0 = x0
+        self.x1 = x1
+        self.top = top
+
+    def __repr__(self) -> str:
+        return (f"Word({self.text!r}, {self.x0:.1f}, {self.x1:.1f}, "
+                f"{self.top:.1f})")
+
+
+def tokenize_chars(chars: Iterable[dict]) -> list[Word]:
+    """Build Word records straight from a page's characters.
+
+    A specialised version of pdfplumber's extract_words() with its default
+    settings for left-to-right text: characters are clustered into lines
+    by top, sorted by x0 within a line, and a word ends at whitespace, a
+    gap wider than WORD_GAP or a step back. Words come out in the same
+    order and with the same text and boxes, without building a dict per
+    word. Rotated characters, absent from the timetables, are left to
+    pdfplumber.
+    """
+    words = []
+    for upright, run in groupby(chars, key=lambda c: c["upright"]):
+        run = list(run)
+        if not upright:
+            from pdfplumber.utils import extract_words
+
+            words += [Word(w["text"], w["x0"], w["x1"], w["top"])
+                      for w in extract_words(run)]
+            continue
+
+        # Line of each distinct top: tops closer than LINE_TOLERANCE to
+        # the previous one (in sorted order) share its line
+        line_of = {}
+        line = -1
+        last = None
+        for top in sorted({c["top"] for c in run}):
+            if last is None or top > last + LINE_TOLERANCE:
+                line += 1
+            line_of[top] = line
+            last = top
+        run.sort(key=lambda c: (line_of[c["top"]], c["x0"]))
+
+        text: list[str] = []
+        for char in run:
+            if char["text"].isspace():
+                if text:
+                    words.append(Word("".join(text), x0, x1, top))
+                    text = []
+                continue
+            if text and not (char["x0"] < prev_x0
+                             or char["x0"] > prev_x1 + WORD_GAP
+                             or abs(char["top"] - prev_top) > LINE_TOLERANCE):
+                text.append(LIGATURES.get(char["text"], char["text"]))
+                x1 = max(x1, char["x1"])
+                top = min(top, char["top"])
+            else:
+                if text:
+                    words.append(Word("".join(text), x0, x1, top))
+                text = [LIGATURES.get(char["text"], char["text"])]
+                x0, x1, top = char["x0"], char["x1"], char["top"]
+            prev_x0, prev_x1, prev_top = char["x0"], char["x1"], char["top"]
+        if text:
+            words.append(Word("".join(text), x0, x1, top))
+    return words
+
+
+class PlumberPage:
+    """A pdfplumber page; words come from its full layout analysis.
+
+    The page's layout objects are parsed on first access and released by
+    `words()` or `close()`, so a page is read once.
+    """
+
+    def __init__(self, page) -> None:
+        self._page = page
+        self.width = page.width
+
+    def content_stream(self) -> bytes:
+        from pdfminer.pdftypes import resolve1
+
+        streams = self._page.page_obj.contents or []
+        return b"".join(resolve1(stream).get_data() for stream in streams)
+
+    def words(self) -> list[Word]:
+        # The page's cached layout objects are dropped as soon as the page
+        # is done, so memory stays bounded by a single page
+        try:
+            return tokenize_chars(self._page.chars)
+        finally:
+            self._page.close()
+
+    def close(self) -> None:
+        self._page.close()
+
+
+class PlumberDocument:
+    """A PDF opened with pdfplumber: slow but handles any font."""
+
+    name = "pdfplumber"
+
+    def __init__(self, pdf_path: str | Path) -> None:
+        import pdfplumber
+
+        self._pdf = pdfplumber.open(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self._pdf.pages)
+
+    def __getitem__(self, index: int) -> PlumberPage:
+        return PlumberPage(self._pdf.pages[index])
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+class FontMetrics(NamedTuple):
+    descent: float  # glyph space units (1/1000 of the font size)
+    widths: dict[str, float]  # character -> glyph space width
+    missing_width: float
+
+
+def _font_metrics(font: dict) -> FontMetrics:
+    """Glyph widths of a simple font, by character.
+
+    Raises:
+        ValueError: for composite (Type0) fonts or encodings other than
+        WinAnsi/Standard, whose glyph widths are keyed by codes the
+        visitor does not report
+    """
+    name = str(font.get("/BaseFont", "")).lstrip("/")
+    if font.get("/Subtype") == "/Type0":
+        raise ValueError(
+            f"composite font {name} is not supported by the pypdf2 backend; "
+            "use --backend pdfplumber"
+        )
+    encoding = font.get("/Encoding")
+    if encoding not in (None, "/WinAnsiEncoding", "/StandardEncoding"):
+        raise ValueError(
+            f"font {name} with encoding {encoding} is not supported by the "
+            "pypdf2 backend; use --backend pdfplumber"
+        )
+
+    descriptor = font.get("/FontDescriptor")
+    descriptor = descriptor.get_object() if descriptor else {}
+    if "/Widths" in font:
+        first = int(font.get("/FirstChar", 0))
+        widths = {}
+        for code, width in enumerate(font["/Widths"], start=first):
+            try:
+                widths[bytes([code]).decode("cp1252")] = float(width)
+            except UnicodeDecodeError:
+                continue
+        return FontMetrics(
+            float(descriptor.get("/Descent", 0)),
+            widths,
+            float(descriptor.get("/MissingWidth", 0)),
+        )
+
+    from pdfminer.fontmetrics import FONT_METRICS
+
+    if name not in FONT_METRICS:
+        raise ValueError(
+            f"font {name} has no glyph widths; use --backend pdfplumber"
+        )
+    standard, widths = FONT_METRICS[name]
+    return FontMetrics(float(standard.get("Descent", 0)), widths, 0.0)
+
+
+def _multiply(m: list[float], n: list[float]) -> tuple[float, ...]:
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a * a2 + b * c2, a * b2 + b * d2,
+            c * a2 + d * c2, c * b2 + d * d2,
+            e * a2 + f * c2 + e2, e * b2 + f * d2 + f2)
+
+
+class PyPDF2Page:
+    """A PyPDF2 page laid out from text positions and glyph widths.
+
+    Only simple fonts (standard 14, or /Widths with WinAnsi/Standard
+    encoding) and upright text are supported; anything else raises
+    ValueError. Character and word spacing (Tc, Tw) are not reported by
+    PyPDF2's visitor and are taken as zero, so text spaced out with them
+    is laid out tighter than pdfplumber would and may merge into words.
+    """
+
+    def __init__(self, page, fonts: dict[str, FontMetrics]) -> None:
+        self._page = page
+        self._fonts = fonts
+        box = page.mediabox
+        self.width = float(box.width)
+        self.height = float(box.height)
+
+    def content_stream(self) -> bytes:
+        contents = self._page.get_contents()
+        return contents.get_data() if contents else b""
+
+    def chars(self) -> list[dict]:
+        """Character boxes in content stream order, as pdfminer lays them out.
+
+        Each visited text run starts at its text matrix; its characters
+        advance by their glyph widths. Character and word spacing operators
+        are not reported by the visitor and are taken as zero.
+        """
+        chars: list[dict] = []
+
+        def visit(text, cm, tm, font, font_size) -> None:
+            if font is None or not text.strip():
+                return
+            key = str(font.get("/BaseFont", ""))
+            metrics = self._fonts.get(key)
+            if metrics is None:
+                metrics = self._fonts[key] = _font_metrics(font)
+            a, b, c, d, e, f = _multiply(tm, cm)
+            if b or c:
+                raise ValueError(
+                    "rotated text is not supported by the pypdf2 backend; "
+                    "use --backend pdfplumber"
+                )
+            scale = font_size / 1000
+            top = self.height - (f + d * (metrics.descent * scale + font_size))
+            x = e
+            # PyPDF2 prefixes a run with a space or newline when it sees a
+            # gap before it; the text matrix is where the real string starts
+            lead = len(text) - len(text.lstrip())
+            for char in text[lead:]:
+                if char == "\n":
+                    continue
+                advance = a * scale * metrics.widths.get(char, metrics.missing_width)
+                chars.append({"text": char, "x0": x, "x1": x + advance,
+                              "top": top, "upright": True})
+                x += advance
+
+        self._page.extract_text(visitor_text=visit)
+        return chars
+
+    def words(self) -> list[Word]:
+        return tokenize_chars(self.chars())
+
+    def close(self) -> None:
+        pass
+
+
+class PyPDF2Document:
+    """A PDF opened with PyPDF2, with the font metrics of all its pages.
+
+    Metrics are cached by /BaseFont, so two embedded fonts sharing a name
+    but not their widths would share the first one's.
+    """
+
+    name = "pypdf2"
+
+    def __init__(self, pdf_path: str | Path) -> None:
+        import PyPDF2
+
+        self._reader = PyPDF2.PdfReader(str(pdf_path))
+        self._fonts: dict[str, FontMetrics] = {}
+
+    def __len__(self) -> int:
+        return len(self._reader.pages)
+
+    def __getitem__(self, index: int) -> PyPDF2Page:
+        return PyPDF2Page(self._reader.pages[index], self._fonts)
+
+    def close(self) -> None:
+        pass
+
+
+class TieredPage:
+    """A page read by the cheap backend, with the full one on standby.
+
+    `cheap` and `full` are the pypdf2 and pdfplumber pages; the page
+    itself reads like its cheap tier.
+    """
+
+    def __init__(self, cheap: PyPDF2Page, full: PlumberPage) -> None:
+        self.cheap = cheap
+        self.full = full
+        self.width = cheap.width
+
+    def content_stream(self) -> bytes:
+        return self.cheap.content_stream()
+
+    def words(self) -> list[Word]:
+        return self.cheap.words()
+
+    def close(self) -> None:
+        self.cheap.close()
+        self.full.close()
+
+
+class TieredDocument:
+    """Opens the PDF with both backends; see TieredPage.
+
+    Both readers stay open for the whole export, though pdfplumber only
+    parses the pages that escalate.
+    """
+
+    name = "tiered"
+
+    def __init__(self, pdf_path: str | Path) -> None:
+        self.cheap = PyPDF2Document(pdf_path)
+        self.full = PlumberDocument(pdf_path)
+
+    def __len__(self) -> int:
+        return len(self.cheap)
+
+    def __getitem__(self, index: int) -> TieredPage:
+        return TieredPage(self.cheap[index], self.full[index])
+
+    def close(self) -> None:
+        self.cheap.close()
+        self.full.close()
+
+
+class FixturePage:
+    """A page replayed from a word fixture (see word_fixtures.py).
+
+    Pages the pre-filter skipped when the fixture was recorded carry that
+    reason in `skip_reason` and have no words.
+    """
+
+    def __init__(self, record: dict) -> None:
+        self.width = record.get("width", 0.0)
+        self.skip_reason = record.get("skip")
+        self._words = record.get("words", ())
+
+    def content_stream(self) -> bytes:
+        return b""
+
+    def words(self) -> list[Word]:
+        return [Word(*word) for word in self._words]
+
+    def close(self) -> None:
+        pass
+
+
+class FixtureDocument:
+    """A words fixture standing in for a PDF, held in memory whole.
+
+    Only timetable (words) fixtures open here; pages have no content
+    stream, so the pre-filter verdict comes from the recording.
+    """
+
+    name = "fixture"
+
+    def __init__(self, fixture_path: str | Path) -> None:
+        from word_fixtures import load_fixture
+
+        self.fixture = load_fixture(fixture_path, "words")
+
+    def __len__(self) -> int:
+        return len(self.fixture["pages"])
+
+    def __getitem__(self, index: int) -> FixturePage:
+        return FixturePage(self.fixture["pages"][index])
+
+    def close(self) -> None:
+        pass
+
+
+BACKENDS = {
+    PlumberDocument.name: PlumberDocument,
+    PyPDF2Document.name: PyPDF2Document,
+    TieredDocument.name: TieredDocument,
+    FixtureDocument.name: FixtureDocument,
+}
+
+
+def open_backend(name: str, pdf_path: str | Path):
+    """Open `pdf_path` with the named backend."""
+    return BACKENDS[name](pdf_path)
@@ -0,0 +1,155 @@
+"""Room registry: parsed room codes and precomputed nearest-room rankings.
+
+Mirrors the room parsing and proximity scoring of app/api/_lib/rooms.ts so
+the web side can walk a precomputed ranking instead of scoring every
+candidate room on each nearest-room request.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+
+ROOM_CODE_PATTERN = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+# Blocs I, J and K are adjacent buildings and count as one group
+BLOC_GROUPS = {"I": "IJK", "J": "IJK", "K": "IJK"}
+
+# Rankings are cut after this many rooms (plus rooms tied with the last one)
+DEFAULT_RANKING_SIZE = 40
+
+REGISTRY_FILE = "rooms.json"
+
+
+class RoomInfo(NamedTuple):
+    code: str
+    bloc: str
+    group: str
+    floor: int
+    number: int
+
+
+@lru_cache(maxsize=1024)
+def parse_room(code: str) -> RoomInfo | None:
+    """Parse 'G308' into bloc G, floor 3, number 8 (memoized per code).
+
+    Returns None for codes that are not a bloc followed by digits, such as
+    'En Ligne' or 'Unknown'.
+    """
+    match = ROOM_CODE_PATTERN.match(code.strip())
+    if not match:
+        return None
+    bloc = match.group(1).upper()
+    digits = match.group(2)
+    return RoomInfo(
+        code=code.strip(),
+        bloc=bloc,
+        group=BLOC_GROUPS.get(bloc, bloc),
+        floor=int(digits[0]),
+        number=int(digits[1:]) if len(digits) > 1 else 0,
+    )
+
+
+def _direction_penalty(delta: int) -> int:
+    return 1 if delta > 0 else 0
+
+
+def proximity_score(origin: RoomInfo, candidate: RoomInfo) -> int:
+    """Distance score of `candidate` from `origin`; lower is closer.
+
+    Same tiers as proximityScore in rooms.ts: same floor, one floor below,
+    one floor above, other floors of the same bloc group, then other blocs.
+    """
+    room_delta = candidate.number - origin.number
+    room_score = abs(room_delta) * 2 + _direction_penalty(room_delta)
+    floor_delta = candidate.floor - origin.floor
+
+    if origin.group != candidate.group:
+        bloc_delta = ord(candidate.bloc[0]) - ord(origin.bloc[0])
+        return (
+            10000
+            + abs(bloc_delta) * 1000
+            + _direction_penalty(bloc_delta) * 100
+            + abs(floor_delta) * 20
+            + _direction_penalty(floor_delta) * 10
+            + room_score
+        )
+
+    if floor_delta == 0:
+        return room_score
+    if floor_delta == -1:
+        return 1000 + room_score
+    if floor_delta == 1:
+        return 2000 + room_score
+    return (
+        3000
+        + abs(floor_delta) * 100
+        + _direction_penalty(floor_delta) * 10
+        + room_score
+    )
+
+
+def nearest_ranking(
+    origin: RoomInfo, rooms: Iterable[RoomInfo], size: int = DEFAULT_RANKING_SIZE
+) -> list[tuple[str, int]]:
+    """Other rooms as (code, score), closest first.
+
+    The ranking keeps every room tied with the last one kept, so any room
+    left out scores strictly worse than every room in the list.
+    """
+    ranked = sorted(
+        (proximity_score(origin, room), room.code)
+        for room in rooms
+        if room.code != origin.code
+    )
+    if len(ranked) > size > 0:
+        cutoff = ranked[size - 1][0]
+        ranked = [entry for entry in ranked if entry[0] <= cutoff]
+    return [(code, score) for score, code in ranked]
+
+
+def physical_rooms(schedules: dict) -> list[RoomInfo]:
+    """Distinct parseable rooms used anywhere in the schedules, sorted."""
+    codes = {
+        slot["room"].strip()
+        for class_data in schedules.values()
+        for slots in class_data.get("days", {}).values()
+        for slot in slots
+    }
+    return sorted(
+        (room for room in map(parse_room, codes) if room), key=lambda room: room.code
+    )
+
+
+def build_room_registry(
+    schedules: dict, size: int = DEFAULT_RANKING_SIZE
+) -> dict[str, dict]:
+    """Registry of every room with its parsed code and nearest-room ranking."""
+    rooms = physical_rooms(schedules)
+    return {
+        room.code: {
+            "bloc": room.bloc,
+            "group": room.group,
+            "floor": room.floor,
+            "number": room.number,
+            "nearest": nearest_ranking(room, rooms, size),
+        }
+        for room in rooms
+    }
+
+
+def write_room_registry(
+    schedules: dict, output_file: str | Path, size: int = DEFAULT_RANKING_SIZE
+) -> int:
+    """Write the room registry JSON; returns the number of rooms."""
+    registry = build_room_registry(schedules, size)
+    Path(output_file).write_text(
+        json.dumps({"ranking_size": size, "rooms": registry}, ensure_ascii=False)
+        + "\n",
+        encoding="utf-8",
+    )
+    return len(registry)
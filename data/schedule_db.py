@@ -0,0 +1,360 @@
+"""SQLite export target shared by the schedule and exam calendar exporters."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Mapping, NamedTuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    primary_room TEXT,
+    year TEXT,
+    period TEXT,
+    schedule_hash TEXT,
+    exams_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS slots (
+    class_id INTEGER NOT NULL REFERENCES classes(id),
+    room_id INTEGER NOT NULL REFERENCES rooms(id),
+    day TEXT NOT NULL,
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
+    course TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS slots_day_time_room
+    ON slots (day, start_min, end_min, room_id);
+CREATE INDEX IF NOT EXISTS slots_class_day ON slots (class_id, day);
+CREATE TABLE IF NOT EXISTS exams (
+    class_id INTEGER NOT NULL REFERENCES classes(id),
+    date TEXT NOT NULL,
+    day TEXT NOT NULL,
+    time TEXT NOT NULL,
+    subject TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exams_class_date ON exams (class_id, date);
+"""
+
+# Slot status for a real course; FREE markers keep their own name
+COURSE_STATUS = "COURSE"
+FREE_MARKERS = {"FREE", "NOT-FREE", "FREEWARNING"}
+ONLINE_ROOM = "En Ligne"
+
+TIME_RANGE_PATTERN = re.compile(r"(\d{1,2})H?:(\d{2})\s*-\s*(\d{1,2})H?:(\d{2})")
+
+
+class ScheduleWriteStats(NamedTuple):
+    """Outcome of one write_schedules call.
+
+    Attributes:
+        changed: Classes whose slots were rewritten (payload hash changed)
+        skipped_slots: Slots of those classes dropped for an unparsable time
+        pruned_rooms: Rooms deleted because no slot refers to them any more
+    """
+
+    changed: int
+    skipped_slots: int
+    pruned_rooms: int
+
+
+def connect(db_path: str | Path) -> sqlite3.Connection:
+    """Open (or create) the export database and ensure the schema exists.
+
+    Args:
+        db_path: Path of the SQLite database file
+
+    Returns:
+        sqlite3.Connection: Connection to the database
+    """
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def payload_hash(payload: object) -> str:
+    """Hash a JSON-serializable payload independently of key order.
+
+    Args:
+        payload: JSON-serializable value
+
+    Returns:
+        str: SHA-256 hex digest of its canonical JSON
+    """
+    canonical = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def parse_time_range(value: str) -> tuple[int, int] | None:
+    """Convert '09H:00-12H:15' (or '09:00 - 12:15') to minutes since midnight.
+
+    Args:
+        value: Slot time range as written in the exports
+
+    Returns:
+        tuple | None: (start, end) in minutes, or None if it does not parse
+    """
+    match = TIME_RANGE_PATTERN.search(value or "")
+    if not match:
+        return None
+    start_h, start_m, end_h, end_m = (int(group) for group in match.groups())
+    return start_h * 60 + start_m, end_h * 60 + end_m
+
+
+def _class_ids(conn: sqlite3.Connection, names: Iterable[str]) -> dict[str, int]:
+    conn.executemany(
+        "INSERT OR IGNORE INTO classes (name) VALUES (?)",
+        ((name,) for name in names),
+    )
+    return dict(conn.execute("SELECT name, id FROM classes"))
+
+
+def _room_ids(conn: sqlite3.Connection, codes: Iterable[str]) -> dict[str, int]:
+    conn.executemany(
+        "INSERT OR IGNORE INTO rooms (code) VALUES (?)",
+        ((code,) for code in codes),
+    )
+    return dict(conn.execute("SELECT code, id FROM rooms"))
+
+
+def _changed(
+    conn: sqlite3.Connection, column: str, hashes: Mapping[str, str]
+) -> list[str]:
+    stored = dict(conn.execute(f"SELECT name, {column} FROM classes"))
+    return [name for name, digest in hashes.items() if stored.get(name) != digest]
+
+
+def write_schedules(
+    conn: sqlite3.Connection, schedules: Mapping[str, dict]
+) -> ScheduleWriteStats:
+    """Upsert reviewed schedules.json data.
+
+    Only classes whose payload hash differs from the stored one are
+    rewritten, and classes missing from `schedules` lose their slots.
+    Slots of rewritten classes whose time does not parse are skipped and
+    counted; rooms no slot refers to any more are pruned. Everything runs
+    in a single transaction with bulk inserts.
+
+    Args:
+        conn: Connection returned by `connect`
+        schedules: Class name to class data, as in schedules.json
+
+    Returns:
+        ScheduleWriteStats: Changed classes, skipped slots and pruned rooms
+    """
+    hashes = {name: payload_hash(data) for name, data in schedules.items()}
+
+    with conn:
+        changed = _changed(conn, "schedule_hash", hashes)
+        class_ids = _class_ids(conn, schedules)
+        room_ids = _room_ids(
+            conn,
+            {
+                slot["room"]
+                for name in changed
+                for slots in schedules[name]["days"].values()
+                for slot in slots
+            },
+        )
+
+        removed = [
+            (class_id,)
+            for name, class_id in class_ids.items()
+            if name not in schedules
+        ]
+        conn.executemany("DELETE FROM slots WHERE class_id = ?", removed)
+        conn.executemany(
+            "UPDATE classes SET schedule_hash = NULL WHERE id = ?", removed
+        )
+
+        rows = []
+        skipped = 0
+        for name in changed:
+            class_id = class_ids[name]
+            for day, slots in schedules[name]["days"].items():
+                for slot in slots:
+                    time_range = parse_time_range(slot["time"])
+                    if not time_range:
+                        skipped += 1
+                        continue
+                    course = slot["course"]
+                    is_marker = course in FREE_MARKERS
+                    rows.append(
+                        (
+                            class_id,
+                            room_ids[slot["room"]],
+                            day,
+                            *time_range,
+                            None if is_marker else course,
+                            course if is_marker else COURSE_STATUS,
+                        )
+                    )
+
+        conn.executemany(
+            "DELETE FROM slots WHERE class_id = ?",
+            ((class_ids[name],) for name in changed),
+        )
+        conn.executemany("INSERT INTO slots VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany(
+            "UPDATE classes SET primary_room = ?, year = ?, period = ?, "
+            "schedule_hash = ? WHERE id = ?",
+            (
+                (
+                    schedules[name]["metadata"].get("primary_room"),
+                    schedules[name]["metadata"].get("year"),
+                    schedules[name]["metadata"].get("period"),
+                    hashes[name],
+                    class_ids[name],
+                )
+                for name in changed
+            ),
+        )
+        pruned = conn.execute(
+            "DELETE FROM rooms WHERE id NOT IN (SELECT room_id FROM slots)"
+        ).rowcount
+
+    return ScheduleWriteStats(len(changed), skipped, pruned)
+
+
+def write_exams(
+    conn: sqlite3.Connection, classes: Mapping[str, list[dict[str, str]]]
+) -> int:
+    """Upsert exam calendar classes.
+
+    Like `write_schedules`, only classes whose payload hash changed are
+    rewritten, and classes missing from `classes` lose their exams.
+
+    Args:
+        conn: Connection returned by `connect`
+        classes: Class name to its exams, as in the exam calendar export
+
+    Returns:
+        int: Number of classes whose exams were rewritten
+    """
+    hashes = {name: payload_hash(exams) for name, exams in classes.items()}
+
+    with conn:
+        changed = _changed(conn, "exams_hash", hashes)
+        class_ids = _class_ids(conn, classes)
+
+        removed = [
+            (class_id,)
+            for name, class_id in class_ids.items()
+            if name not in classes
+        ]
+        conn.executemany("DELETE FROM exams WHERE class_id = ?", removed)
+        conn.executemany("UPDATE classes SET exams_hash = NULL WHERE id = ?", removed)
+
+        conn.executemany(
+            "DELETE FROM exams WHERE class_id = ?",
+            ((class_ids[name],) for name in changed),
+        )
+        conn.executemany(
+            "INSERT INTO exams VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    class_ids[name],
+                    exam["date"],
+                    exam["day"],
+                    exam["time"],
+                    exam["subject"],
+                )
+                for name in changed
+                for exam in classes[name]
+            ),
+        )
+        conn.executemany(
+            "UPDATE classes SET exams_hash = ? WHERE id = ?",
+            ((hashes[name], class_ids[name]) for name in changed),
+        )
+
+    return len(changed)
+
+
+def free_rooms(conn: sqlite3.Connection, day: str, minute: int) -> dict[str, list[str]]:
+    """Physical rooms that are empty, or free with a warning, at day/minute.
+
+    Mirrors the web logic: real courses and NOT-FREE slots occupy a room,
+    FREEWARNING slots flag it, and online sessions occupy nothing.
+
+    Args:
+        conn: Connection returned by `connect`
+        day: Day key, as in schedules.json
+        minute: Time of day in minutes since midnight
+
+    Returns:
+        dict: {'empty': [...], 'warning': [...]} room codes, sorted
+    """
+    rows = conn.execute(
+        """
+        SELECT r.code,
+               MAX(s.status IN (?, 'NOT-FREE')) AS occupied,
+               MAX(s.status = 'FREEWARNING') AS warning
+        FROM rooms r
+        LEFT JOIN slots s
+               ON s.room_id = r.id
+              AND s.day = ?
+              AND s.start_min <= ?
+              AND s.end_min > ?
+        WHERE r.code != ?
+        GROUP BY r.code
+        ORDER BY r.code
+        """,
+        (COURSE_STATUS, day, minute, minute, ONLINE_ROOM),
+    )
+    result: dict[str, list[str]] = {"empty": [], "warning": []}
+    for code, occupied, warning in rows:
+        if occupied:
+            continue
+        result["warning" if warning else "empty"].append(code)
+    return result
+
+
+def class_location(
+    conn: sqlite3.Connection, class_name: str, day: str, minute: int
+) -> dict[str, str | None] | None:
+    """Slot a class is in at day/minute, or None if it has no slot then.
+
+    Args:
+        conn: Connection returned by `connect`
+        class_name: Class name, as in schedules.json
+        day: Day key, as in schedules.json
+        minute: Time of day in minutes since midnight
+
+    Returns:
+        dict | None: The slot's room, course (None for markers), status and
+        'HH:MM-HH:MM' time; the earliest slot wins if several overlap
+    """
+    row = conn.execute(
+        """
+        SELECT r.code, s.course, s.status, s.start_min, s.end_min
+        FROM slots s
+        JOIN classes c ON c.id = s.class_id
+        JOIN rooms r ON r.id = s.room_id
+        WHERE c.name = ? AND s.day = ? AND s.start_min <= ? AND s.end_min > ?
+        ORDER BY s.start_min
+        LIMIT 1
+        """,
+        (class_name, day, minute, minute),
+    ).fetchone()
+    if row is None:
+        return None
+    room, course, status, start, end = row
+    return {
+        "room": room,
+        "course": course,
+        "status": status,
+        "time": f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}",
+    }
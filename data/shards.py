@@ -0,0 +1,141 @@
+"""Sharded schedule layout: one small JSON file per class and per room.
+
+Written next to schedules.json by the exporter, so the web side can read
+one class's week (a couple of KB) instead of the whole file:
+
+    schedules/_index.json         class and room shard files with their
+                                  content hashes
+    schedules/<class>.json        one class, exactly as in schedules.json
+    schedules/rooms/<room>.json   the slots held in one room, by class and
+                                  day
+
+A shard is rewritten only when its content hash changes, and shards of
+classes or rooms that are gone are removed.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import quote
+
+from manifest import content_hash
+
+
+INDEX_FILE = "_index.json"
+ROOM_DIR = "rooms"
+
+
+class ShardStats(NamedTuple):
+    """Outcome of one write_schedule_shards call.
+
+    Attributes:
+        written: Class and room shards written (new or changed content)
+        unchanged: Shards left in place, their index hash being current
+        removed: Shards deleted because their class or room is gone
+    """
+
+    written: int
+    unchanged: int
+    removed: int
+
+
+def shard_directory(output_file: str | Path) -> Path:
+    """Shard directory of an export: schedules.json -> schedules/.
+
+    Args:
+        output_file: Path of the exported JSON file
+
+    Returns:
+        Path: The path without its suffix, or `<name>.shards` when it has none
+    """
+    path = Path(output_file)
+    if path.suffix:
+        return path.with_suffix("")
+    return path.with_name(path.name + ".shards")
+
+
+def shard_file(key: str) -> str:
+    """File name of a class or room shard, safe on any filesystem.
+
+    Args:
+        key: Class name or room code
+
+    Returns:
+        str: The percent-encoded key with a .json suffix
+    """
+    return quote(key, safe="") + ".json"
+
+
+def _encode(value: object) -> bytes:
+    return json.dumps(value, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def room_shards(schedules: dict) -> dict[str, dict]:
+    """Slots of each room as {class: {day: [slot, ...]}}, in schedule order.
+
+    Args:
+        schedules: Class name to class data, as in schedules.json
+
+    Returns:
+        dict: Room code to its slots, sorted by room; slots without a
+        room are left out
+    """
+    rooms: dict[str, dict] = {}
+    for class_name, class_data in schedules.items():
+        for day, slots in class_data.get("days", {}).items():
+            for slot in slots:
+                room = slot.get("room", "").strip()
+                if room:
+                    rooms.setdefault(room, {}).setdefault(
+                        class_name, {}).setdefault(day, []).append(slot)
+    return dict(sorted(rooms.items()))
+
+
+def write_schedule_shards(schedules: dict, directory: str | Path) -> ShardStats:
+    """Write the class and room shards of `schedules` and their index.
+
+    Args:
+        schedules: Class name to class data, as in schedules.json
+        directory: Shard directory, created if missing
+
+    Returns:
+        ShardStats: How many shards were written, left unchanged and removed
+    """
+    directory = Path(directory)
+    (directory / ROOM_DIR).mkdir(parents=True, exist_ok=True)
+    index_path = directory / INDEX_FILE
+    try:
+        previous = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = {}
+
+    written = unchanged = removed = 0
+    index: dict[str, dict] = {}
+    for section, subdirectory, shards in (
+        ("classes", directory, schedules),
+        ("rooms", directory / ROOM_DIR, room_shards(schedules)),
+    ):
+        entries = index[section] = {}
+        for key, content in shards.items():
+            data = _encode(content)
+            entry = {"file": shard_file(key), "hash": content_hash(data)}
+            if section == "rooms":
+                entry["file"] = f"{ROOM_DIR}/{entry['file']}"
+            entries[key] = entry
+
+            path = directory / entry["file"]
+            if previous.get(section, {}).get(key) == entry and path.exists():
+                unchanged += 1
+            else:
+                path.write_bytes(data)
+                written += 1
+
+        for key, old in previous.get(section, {}).items():
+            if key not in entries:
+                (directory / old["file"]).unlink(missing_ok=True)
+                removed += 1
+
+    index_path.write_bytes(_encode(index) + b"\n")
+    return ShardStats(written, unchanged, removed)
@@ -0,0 +1,28 @@
+"""Replay every recorded fixture and compare with its recorded output.
+
+Run with:  python -m pytest data/tests
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# The data scripts import each other as siblings
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from word_fixtures import FIXTURE_DIR, check_fixture  # noqa: E402
+
+
+FIXTURES = sorted(FIXTURE_DIR.glob("*.json.gz"))
+
+
+def test_fixtures_recorded():
+    assert FIXTURES, f"no fixtures in {FIXTURE_DIR}; run word_fixtures.py record"
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.name)
+def test_replay_matches_record(path):
+    assert check_fixture(path) == []
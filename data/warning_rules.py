@@ -0,0 +1,181 @@
+"""Declarative FREEWARNING rules for FREE slots.
+
+Rules live in a JSON file (freewarning_rules.json by default), one object
+per rule:
+
+    prefix or pattern   room code prefix, or a regex the whole code matches
+    days                optional day names ("Mercredi"); default every day
+    window              optional "morning", "afternoon" (the schedule
+                        profile's session) or ["HH:MM", "HH:MM"]; a FREE
+                        slot matches when it overlaps the window
+    dates               optional ["YYYY-MM-DD", "YYYY-MM-DD"], inclusive
+    description         free text, ignored
+
+A rule set is compiled once into a table keyed by room prefix and day, and
+each (room, day) pair resolves to its applicable windows on first use, so
+the cost per FREE slot does not grow with the number of rules.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Mapping, NamedTuple
+
+
+DEFAULT_RULES_FILE = Path(__file__).resolve().parent / "freewarning_rules.json"
+
+RULE_KEYS = {"description", "prefix", "pattern", "days", "window", "dates"}
+CLOCK_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+class CompiledRule(NamedTuple):
+    window: tuple[int, int] | None
+    dates: tuple[date, date] | None
+
+
+class WarningRules:
+    """Compiled rule set; `matches` answers one FREE slot."""
+
+    def __init__(
+        self,
+        rules: Iterable[Mapping],
+        profile_windows: Mapping[str, tuple[int, int]],
+        source: str = "rules",
+    ) -> None:
+        # (prefix, day) -> rules; day None applies to every day
+        self._by_prefix: dict[tuple[str, str | None], list[CompiledRule]] = {}
+        self._patterns: list[tuple[re.Pattern, frozenset | None, CompiledRule]] = []
+        self._resolved: dict[tuple[str, str], tuple[CompiledRule, ...]] = {}
+        self.rule_count = 0
+
+        for number, rule in enumerate(rules, start=1):
+            where = f"{source} rule {number}"
+            days, compiled = _compile_rule(rule, profile_windows, where)
+            if "prefix" in rule:
+                prefix = str(rule["prefix"]).strip().upper()
+                for day in days or (None,):
+                    self._by_prefix.setdefault((prefix, day), []).append(compiled)
+            else:
+                try:
+                    pattern = re.compile(rule["pattern"], re.IGNORECASE)
+                except re.error as e:
+                    raise ValueError(f"{where}: invalid pattern ({e})") from None
+                self._patterns.append((pattern, days, compiled))
+            self.rule_count += 1
+
+        self._prefix_lengths = sorted({len(prefix) for prefix, _ in self._by_prefix})
+
+    def _rules_for(self, room: str, day: str) -> tuple[CompiledRule, ...]:
+        key = (room, day)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            code = room.strip().upper()
+            found: list[CompiledRule] = []
+            for length in self._prefix_lengths:
+                if length <= len(code):
+                    found += self._by_prefix.get((code[:length], None), ())
+                    found += self._by_prefix.get((code[:length], day), ())
+            found += [
+                compiled
+                for pattern, days, compiled in self._patterns
+                if (days is None or day in days) and pattern.fullmatch(code)
+            ]
+            resolved = self._resolved[key] = tuple(found)
+        return resolved
+
+    def matches(
+        self,
+        room: str,
+        day: str,
+        start: int,
+        end: int,
+        slot_date: date | None = None,
+    ) -> bool:
+        """True if a FREE slot in `room` on `day`, start-end minutes, is a warning.
+
+        Rules with a date range only match slots whose date is known.
+        """
+        for rule in self._rules_for(room, day):
+            if rule.window and not (start < rule.window[1] and rule.window[0] < end):
+                continue
+            if rule.dates and not (
+                slot_date and rule.dates[0] <= slot_date <= rule.dates[1]
+            ):
+                continue
+            return True
+        return False
+
+
+def _clock_minutes(value: object, where: str) -> int:
+    match = CLOCK_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError(f"{where}: invalid time {value!r}, expected HH:MM")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def _compile_rule(
+    rule: Mapping, profile_windows: Mapping[str, tuple[int, int]], where: str
+) -> tuple[frozenset | None, CompiledRule]:
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {', '.join(sorted(unknown))}")
+    if ("prefix" in rule) == ("pattern" in rule):
+        raise ValueError(f"{where}: needs exactly one of 'prefix' or 'pattern'")
+
+    days = frozenset(rule["days"]) if rule.get("days") else None
+
+    window = rule.get("window")
+    if window is None:
+        span = None
+    elif isinstance(window, str):
+        if window not in profile_windows:
+            raise ValueError(
+                f"{where}: unknown window {window!r}, expected one of "
+                f"{', '.join(profile_windows)} or [start, end]"
+            )
+        span = profile_windows[window]
+    elif isinstance(window, list) and len(window) == 2:
+        span = (_clock_minutes(window[0], where), _clock_minutes(window[1], where))
+    else:
+        raise ValueError(f"{where}: window must be a name or [start, end]")
+
+    dates = rule.get("dates")
+    if dates is not None:
+        try:
+            first, last = (date.fromisoformat(value) for value in dates)
+        except (TypeError, ValueError):
+            raise ValueError(
+                f"{where}: dates must be [YYYY-MM-DD, YYYY-MM-DD]"
+            ) from None
+        dates = (first, last)
+
+    return days, CompiledRule(window=span, dates=dates)
+
+
+# (path, profile windows) -> (mtime, compiled rules)
+_loaded: dict[tuple[str, tuple], tuple[float, WarningRules]] = {}
+
+
+def load_rules(
+    path: str | Path | None, profile_windows: Mapping[str, tuple[int, int]]
+) -> WarningRules:
+    """Compile a rule file, reusing the compiled set until the file changes.
+
+    Calling this again after the file was edited picks up the new rules,
+    so long-running callers can reload by simply asking again.
+    """
+    path = Path(path or DEFAULT_RULES_FILE)
+    key = (str(path.resolve()), tuple(sorted(profile_windows.items())))
+    mtime = path.stat().st_mtime
+    cached = _loaded.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    rules = WarningRules(data.get("rules", []), profile_windows, source=path.name)
+    _loaded[key] = (mtime, rules)
+    return rules
@@ -0,0 +1,265 @@
+"""Recorded parser inputs, replayed without any PDF parsing.
+
+A fixture holds what the PDF library hands our parsers, page by page:
+
+    words    the timetable pages' Word records (text, x0, x1, top) and
+             widths, or the pre-filter's reason for skipping a page
+    tables   the exam calendar pages' table rows
+
+with the per-class hashes of the output they produced when recorded.
+Replaying a fixture runs the real parsing stages (course positions, day
+assignment, FREE-slot review; row repair for exams) in milliseconds, so
+`check` is a regression run of our own code and the fixtures double as
+benchmark inputs that leave out pdfplumber's time (benchmarks.py replay).
+
+Fixtures of the bundled PDFs live in fixtures/ as gzipped compact JSON:
+
+    python data/word_fixtures.py record        # re-record after a PDF update
+    python data/word_fixtures.py check         # replay and compare
+
+The same comparison runs with the test suite (tests/test_fixtures.py).
+
+Timetable fixtures also replay through the exporter itself:
+``python data/data_exporter.py fixtures/last.words.json.gz out.json
+--backend fixture``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from manifest import canonical_json, content_hash, entry_hashes
+
+
+DATA_DIR = Path(__file__).resolve().parent
+FIXTURE_DIR = DATA_DIR / "fixtures"
+FIXTURE_VERSION = 1
+
+# Bundled PDFs and the fixture kind recorded from each
+BUNDLED_PDFS = {
+    "last.pdf": "words",
+    "Calendrier_Session_Principale_2526_VF.pdf": "tables",
+}
+
+
+def fixture_path(pdf_path: str | Path, kind: str) -> Path:
+    return FIXTURE_DIR / f"{Path(pdf_path).stem}.{kind}.json.gz"
+
+
+def load_fixture(path: str | Path, kind: str | None = None) -> dict:
+    """Read a fixture, checking its format version and kind.
+
+    Raises:
+        ValueError: for another kind of fixture or an older format
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        fixture = json.load(f)
+    if fixture.get("version") != FIXTURE_VERSION:
+        raise ValueError(
+            f"{path}: fixture format {fixture.get('version')}, expected "
+            f"{FIXTURE_VERSION}; record it again"
+        )
+    if kind and fixture.get("kind") != kind:
+        raise ValueError(f"{path}: a {fixture.get('kind')} fixture, not {kind}")
+    return fixture
+
+
+def _write_fixture(path: Path, fixture: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(fixture, ensure_ascii=False, separators=(",", ":"))
+    # mtime=0 keeps the file byte-identical when nothing changed
+    with open(path, "wb") as raw, gzip.GzipFile(
+        fileobj=raw, mode="wb", mtime=0
+    ) as f:
+        f.write(data.encode("utf-8"))
+
+
+def _expected(output: dict, classes: dict) -> dict:
+    return {
+        "output": content_hash(canonical_json(output)),
+        "classes": entry_hashes(classes),
+    }
+
+
+def record_words(
+    pdf_path: str | Path, output: str | Path | None = None,
+    backend: str = "pdfplumber",
+) -> Path:
+    """Record the words of a timetable PDF, and what the parser made of them.
+
+    The expected output comes from a normal parse of the PDF, so a replay
+    that matches it shows the fixture stands in for the PDF.
+    """
+    from data_exporter import ScheduleToJSON
+    from pdf_backends import open_backend
+
+    prefilter = ScheduleToJSON()
+    pages = []
+    document = open_backend(backend, pdf_path)
+    try:
+        for index in range(len(document)):
+            page = document[index]
+            skip_reason = prefilter._prefilter_page(page)
+            if skip_reason:
+                page.close()
+                pages.append({"skip": skip_reason})
+                continue
+            pages.append({
+                "width": page.width,
+                "words": [[word.text, word.x0, word.x1, word.top]
+                          for word in page.words()],
+            })
+    finally:
+        document.close()
+
+    reference = ScheduleToJSON()
+    with redirect_stdout(io.StringIO()):
+        reference.parse_pdf_spatial(pdf_path, backend=backend)
+        reference._prepare_export()
+
+    path = Path(output or fixture_path(pdf_path, "words"))
+    _write_fixture(path, {
+        "version": FIXTURE_VERSION,
+        "kind": "words",
+        "source": Path(pdf_path).name,
+        "pages": pages,
+        "expected": _expected(reference.schedules, reference.schedules),
+    })
+    return path
+
+
+def record_tables(
+    pdf_path: str | Path, output: str | Path | None = None,
+    table_mode: str = "grid",
+) -> Path:
+    """Record the table rows of an exam calendar PDF, and the calendar."""
+    from exam_calendar_exporter import build_exam_calendar, iter_page_tables
+
+    tables = [table for _, table in iter_page_tables(Path(pdf_path), table_mode)]
+    data = build_exam_calendar(enumerate(tables, start=1), Path(pdf_path).name)
+
+    path = Path(output or fixture_path(pdf_path, "tables"))
+    _write_fixture(path, {
+        "version": FIXTURE_VERSION,
+        "kind": "tables",
+        "source": Path(pdf_path).name,
+        "pages": tables,
+        "expected": _expected(data, data["classes"]),
+    })
+    return path
+
+
+def replay_words(path: str | Path, workers: int = 1) -> dict:
+    """Schedules parsed from a words fixture, FREE slots reviewed."""
+    from data_exporter import ScheduleToJSON
+
+    parser = ScheduleToJSON()
+    with redirect_stdout(io.StringIO()):
+        parser.parse_pdf_spatial(path, workers, backend="fixture")
+        parser._prepare_export()
+    return parser.schedules
+
+
+def replay_tables(path: str | Path) -> dict:
+    """Exam calendar built from a tables fixture."""
+    from exam_calendar_exporter import build_exam_calendar
+
+    fixture = load_fixture(path, "tables")
+    return build_exam_calendar(
+        enumerate(fixture["pages"], start=1), fixture["source"]
+    )
+
+
+def replay(path: str | Path) -> tuple[dict, dict]:
+    """(output, classes) replayed from a fixture of either kind."""
+    if load_fixture(path)["kind"] == "words":
+        schedules = replay_words(path)
+        return schedules, schedules
+    data = replay_tables(path)
+    return data, data["classes"]
+
+
+def check_fixture(path: str | Path) -> list[str]:
+    """Replay a fixture; the classes whose output differs from the record.
+
+    A change outside the classes (e.g. exam metadata) is reported as
+    '(metadata)'.
+    """
+    expected = load_fixture(path)["expected"]
+    output, classes = replay(path)
+    if content_hash(canonical_json(output)) == expected["output"]:
+        return []
+    hashes = entry_hashes(classes)
+    differing = sorted(
+        name for name in hashes.keys() | expected["classes"].keys()
+        if hashes.get(name) != expected["classes"].get(name)
+    )
+    return differing or ["(metadata)"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Record or replay parser input fixtures"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser(
+        "record", help="Record fixtures (default: the bundled PDFs)"
+    )
+    record.add_argument("--words", nargs="+", metavar="PDF", default=[],
+                        help="Timetable PDFs to record words from")
+    record.add_argument("--tables", nargs="+", metavar="PDF", default=[],
+                        help="Exam calendar PDFs to record table rows from")
+    check = commands.add_parser(
+        "check", help="Replay fixtures and compare with their recorded output"
+    )
+    check.add_argument("fixtures", nargs="*",
+                       help="Fixture files (default: every one in fixtures/)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        sources = [(pdf, "words") for pdf in args.words]
+        sources += [(pdf, "tables") for pdf in args.tables]
+        if not sources:
+            sources = [(DATA_DIR / name, kind)
+                       for name, kind in BUNDLED_PDFS.items()]
+        for pdf, kind in sources:
+            start = time.perf_counter()
+            path = (record_words if kind == "words" else record_tables)(pdf)
+            print(f"Recorded {path.name} ({path.stat().st_size // 1024} KB) "
+                  f"in {time.perf_counter() - start:.1f} s")
+        return 0
+
+    fixtures = args.fixtures or sorted(FIXTURE_DIR.glob("*.json.gz"))
+    if not fixtures:
+        print(f"No fixtures in {FIXTURE_DIR}; run 'record' first")
+        return 1
+    failed = 0
+    for path in fixtures:
+        start = time.perf_counter()
+        try:
+            differing = check_fixture(path)
+        except ValueError as e:
+            failed += 1
+            print(f"FAIL {Path(path).name}: {e}")
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        if differing:
+            failed += 1
+            preview = ", ".join(differing[:10])
+            more = f" (+{len(differing) - 10} more)" if len(differing) > 10 else ""
+            print(f"FAIL {Path(path).name}: {len(differing)} classes differ: "
+                  f"{preview}{more}")
+        else:
+            print(f"OK   {Path(path).name} ({elapsed:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())